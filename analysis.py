@@ -1,32 +1,30 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 from statsmodels.stats.anova import AnovaRM
 
-def run_analysis_v4():
-    print("Loading data...")
-    try:
-        df = pd.read_excel('data.xlsx')
-    except FileNotFoundError:
-        print("Error: data.xlsx not found.")
-        return
+from resampling import format_within_subject, within_subject_test
+from study_data import load_study_table
 
-    # --- 1. FEATURE ENGINEERING ---
-    # Ease Calculation (High Likert = Good)
-    df['z_NASA'] = stats.zscore(df['NASA_Total'])
-    df['z_HR'] = stats.zscore(df['Delta_HR'])
-    df['z_Pupil'] = stats.zscore(df['Delta_Pupil_mean'])
-    df['z_Likert'] = stats.zscore(df['LIKERT_Total'])
-    
-    # Strain Index
-    df['Strain_Index'] = (df['z_NASA'] + df['z_HR'] + df['z_Pupil'] + df['z_Likert']) / 4
-    df['Learning_Ease'] = -1 * df['Strain_Index']
+def run_analysis_v4(df=None, method='permutation', n_resamples=10000, seed=0):
+    if df is None:
+        print("Loading data...")
+        try:
+            df = load_study_table('data.xlsx')
+        except FileNotFoundError:
+            print("Error: data.xlsx not found.")
+            return
 
     # --- 2. STATISTICAL TESTS FUNCTION ---
     def test_variable(var_name, display_name):
         print(f"\n=== TESTING: {display_name} ===")
+
+        # Resampling needs no normality assumption, so there is nothing to gate on
+        if method == 'permutation':
+            result = within_subject_test(df, var_name, n_resamples=n_resamples, seed=seed)
+            print(format_within_subject(result))
+            return
         
         # Normality Check
         print("--- Normality Check (Shapiro-Wilk) ---")
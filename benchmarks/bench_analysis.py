@@ -0,0 +1,173 @@
+"""Scaling benchmark for the analysis path.
+
+Generates a study table shaped like ``data.xlsx`` (three modalities per
+participant, rotated topics) at each requested size and times each analysis
+stage on it: loading (Excel and the cached table), the derived columns,
+quadrant classification, the permutation tests and the mixed models.
+
+    python -m benchmarks.bench_analysis --rows 27 1000 100000 --stage quadrants
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from mixed_effects import fit_mixed_models
+from quadrant_analysis import classify_quadrants, quadrant_table
+from resampling import between_groups_test, within_subject_test
+from study_data import add_derived_columns, load_study_table
+
+MODALITIES = ["Reading", "Audio", "Kinesthetic"]
+
+
+def generate_study_table(n_rows=27, seed=0):
+    """Synthetic questionnaire/physiology table with ``n_rows`` rows.
+
+    Like the real study, every participant has one row per modality and sees
+    each topic once, with topics rotated across participants (a Latin
+    square), so any multiple of nine fills every Modality x Topic cell evenly.
+    """
+    rng = np.random.default_rng(seed)
+    n_ids = -(-n_rows // len(MODALITIES))  # the last participant may be partial
+    ids = np.repeat(np.arange(1, n_ids + 1), len(MODALITIES))[:n_rows]
+    order = np.argsort(rng.random((n_ids, len(MODALITIES))), axis=1)
+    modality = np.array(MODALITIES)[order].ravel()[:n_rows]
+    topic = ((order + np.arange(n_ids)[:, None]) % len(MODALITIES) + 1).ravel()[:n_rows]
+    subject = rng.normal(0, 1, n_ids + 1)[ids]
+    return pd.DataFrame(
+        {
+            "ID": ids,
+            "Topic": topic,
+            "Modality": modality,
+            "NASA_Total": rng.integers(20, 100, n_rows),
+            "LIKERT_Total": rng.integers(5, 35, n_rows),
+            "Delta_HR": rng.normal(3, 3, n_rows) + subject,
+            "Delta_Pupil_mean": rng.normal(0.1, 0.05, n_rows),
+            "Objective_Percent": np.clip(
+                rng.normal(60, 15, n_rows) + 5 * subject, 0, 100
+            ).round(),
+        }
+    )
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def stage_load(df, xlsx_max_rows=20_000):
+    """Excel read (what the report scripts used to do) vs. the cached table."""
+    times = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            if len(df) <= xlsx_max_rows:
+                df.to_excel("data.xlsx", index=False)
+                times["read_excel_s"] = _timed(pd.read_excel, "data.xlsx")
+                source = "data.xlsx"
+            else:
+                df.to_csv("data.csv", index=False)
+                source = "data.csv"
+            times["load_uncached_s"] = _timed(load_study_table, source, use_cache=False)
+            load_study_table(source)  # populate the cache
+            times["load_cached_s"] = _timed(load_study_table, source)
+        finally:
+            os.chdir(cwd)
+    return times
+
+
+def stage_derived(df):
+    return {"elapsed_s": _timed(add_derived_columns, df.copy())}
+
+
+def stage_quadrants(df):
+    df = add_derived_columns(df.copy())
+    start = time.perf_counter()
+    types = classify_quadrants(df)
+    quadrant_table(df, types)
+    return {"elapsed_s": time.perf_counter() - start}
+
+
+def stage_permutation(df, n_resamples=1000):
+    df = add_derived_columns(df.copy())
+    return {
+        "elapsed_s": _timed(
+            within_subject_test, df, "Learning_Ease", n_resamples=n_resamples, seed=0
+        )
+    }
+
+
+def stage_combo(df, n_resamples=1000):
+    df = add_derived_columns(df.copy())
+    df["Condition"] = "T" + df["Topic"].astype(str) + "_" + df["Modality"]
+    return {
+        "elapsed_s": _timed(
+            between_groups_test,
+            df,
+            "Learning_Ease",
+            "Condition",
+            n_resamples=n_resamples,
+            seed=0,
+        )
+    }
+
+
+def stage_mixed(df):
+    df = add_derived_columns(df.copy())
+    return {"elapsed_s": _timed(fit_mixed_models, df)}
+
+
+STAGES = {
+    "load": stage_load,
+    "derived": stage_derived,
+    "quadrants": stage_quadrants,
+    "permutation": stage_permutation,
+    "combo": stage_combo,
+    "mixed": stage_mixed,
+}
+
+
+def run_benchmark(n_rows=27, stage="quadrants", repeat=3, seed=0):
+    """Time ``stage`` ``repeat`` times on a generated table of ``n_rows``.
+
+    Table generation is not timed. Every timing the stage reports is
+    summarised as its median and maximum over the repeats.
+    """
+    df = generate_study_table(n_rows, seed)
+    runs = [STAGES[stage](df) for _ in range(repeat)]
+    metrics = {"rows": n_rows}
+    for key in runs[0]:
+        values = np.array([run[key] for run in runs])
+        name = key[:-2] if key.endswith("_s") else key
+        metrics[f"{name}_p50_s"] = float(np.median(values))
+        metrics[f"{name}_max_s"] = float(values.max())
+    if "elapsed_s" in runs[0]:
+        metrics["rows_per_s"] = n_rows / max(metrics["elapsed_p50_s"], 1e-9)
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[27, 1000, 10_000])
+    parser.add_argument(
+        "--stage", nargs="+", default=list(STAGES), help=", ".join(STAGES)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    unknown = [s for s in args.stage if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    for stage in args.stage:
+        for n_rows in args.rows:
+            metrics = run_benchmark(n_rows, stage, args.repeat)
+            timings = "  ".join(
+                f"{k}={v:.4f}" for k, v in metrics.items() if k.endswith("_p50_s")
+            )
+            print(f"{stage:<12} {n_rows:>8} rows  {timings}")
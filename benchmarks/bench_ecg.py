@@ -0,0 +1,110 @@
+"""Throughput and latency benchmark for the ECG acquisition path.
+
+Streams synthetic packets from a simulated Movesense sensor through the
+real ``notification_handler`` and ``RawECGLogger`` and reports samples/s,
+per-packet handler latency and samples lost between the radio and disk.
+
+    python -m benchmarks.bench_ecg --rate 128 512 2048 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ble_sim import SimulatedClient, SimulatedMovesense
+from ecg_format import ECGRecording
+from store_ecg_webcam import (
+    NOTIFY_CHARACTERISTIC_UUID,
+    WRITE_CHARACTERISTIC_UUID,
+    RawECGLogger,
+    make_notification_handler,
+)
+
+
+def count_logged_samples(log_file):
+    if log_file.suffix == ".csv":
+        with open(log_file) as f:
+            return sum(1 for _ in f) - 1
+    return len(ECGRecording(log_file))
+
+
+async def _stream(rate, duration, burst, drop_rate, log_format, seed):
+    logger = RawECGLogger("bench", log_format=log_format, sampling_rate=rate)
+    handler = make_notification_handler(logger)
+    latencies = []
+
+    def timed_handler(sender, data):
+        start = time.perf_counter()
+        handler(sender, data)
+        latencies.append(time.perf_counter() - start)
+
+    device = SimulatedMovesense(rate, burst=burst, drop_rate=drop_rate, seed=seed)
+    start = time.perf_counter()
+    async with SimulatedClient(device, duration) as client:
+        await client.start_notify(NOTIFY_CHARACTERISTIC_UUID, timed_handler)
+        await client.write_gatt_char(
+            WRITE_CHARACTERISTIC_UUID,
+            bytearray([1, 100]) + bytearray(f"/Meas/ECG/{rate}", "utf-8"),
+            response=True,
+        )
+        await client.wait()
+    logger.close()
+    elapsed = time.perf_counter() - start
+
+    written = count_logged_samples(logger.log_file)
+    latencies_us = np.array(latencies) * 1e6
+    return {
+        "rate": rate,
+        "burst": burst,
+        "format": log_format,
+        "elapsed_s": elapsed,
+        "samples_sent": device.stats["samples_sent"],
+        "samples_written": written,
+        "samples_lost": device.stats["samples_sent"] - written,
+        "packets_dropped_in_air": device.stats["packets_dropped"],
+        "samples_per_s": written / elapsed,
+        "latency_us_p50": float(np.percentile(latencies_us, 50)),
+        "latency_us_p99": float(np.percentile(latencies_us, 99)),
+        "latency_us_max": float(latencies_us.max()),
+    }
+
+
+def run_benchmark(rate=128, duration=10.0, burst=1, drop_rate=0.0,
+                  log_format="csv", seed=0):
+    """Run one simulated session in a scratch directory and return metrics."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            return asyncio.run(
+                _stream(rate, duration, burst, drop_rate, log_format, seed)
+            )
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, nargs="+", default=[128])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--format", choices=RawECGLogger.LOG_FORMATS, default="csv")
+    args = parser.parse_args()
+
+    for rate in args.rate:
+        result = run_benchmark(
+            rate, args.duration, args.burst, args.drop_rate, args.format
+        )
+        print(
+            f"{rate:>6} Hz  {result['samples_per_s']:>9.1f} samples/s  "
+            f"handler p50={result['latency_us_p50']:.1f}us "
+            f"p99={result['latency_us_p99']:.1f}us "
+            f"max={result['latency_us_max']:.1f}us  "
+            f"lost={result['samples_lost']} "
+            f"(air drops: {result['packets_dropped_in_air']} packets)"
+        )
@@ -0,0 +1,93 @@
+"""Throughput benchmark for the webcam recording path.
+
+Runs ``webcam_capture`` against a synthetic (or replayed) frame source for
+each resolution, with still capture off and on, and reports sustained fps,
+encode time per frame, peak queue depth and disk write bandwidth.
+
+    python -m benchmarks.bench_webcam --resolution 640x480 1280x720 --duration 5
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from frame_sources import ReplaySource, SyntheticSource, synthetic_screenshot
+from store_ecg_webcam import webcam_capture
+
+
+def _dir_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def run_benchmark(width=640, height=480, duration=5.0, save_stills=False,
+                  fps=None, replay=None):
+    """Record ``duration`` seconds in a scratch directory and return metrics."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for sub in ("webcam_frames", "screenshots", "video_recordings"):
+                os.makedirs(f"data/bench/{sub}", exist_ok=True)
+            if replay is not None:
+                source = ReplaySource(Path(cwd) / replay, fps=fps, loop=True)
+            else:
+                source = SyntheticSource(width, height, fps=fps)
+            stop_event = threading.Event()
+            timer = threading.Timer(duration, stop_event.set)
+
+            start = time.perf_counter()
+            timer.start()
+            stats = webcam_capture(
+                stop_event,
+                "bench",
+                source=source,
+                screenshot=synthetic_screenshot(),
+                save_stills=save_stills,
+            )
+            elapsed = time.perf_counter() - start
+            disk_bytes = _dir_bytes("data/bench")
+        finally:
+            os.chdir(cwd)
+
+    written = max(stats["written"], 1)
+    return {
+        "resolution": f"{source.width}x{source.height}",
+        "stills": save_stills,
+        "elapsed_s": elapsed,
+        "captured": stats["captured"],
+        "written": stats["written"],
+        "dropped_video": stats["dropped_video"],
+        "dropped_stills": stats["dropped_stills"],
+        "dropped_video_fraction": stats["dropped_video"] / max(stats["captured"], 1),
+        "dropped_stills_fraction": stats["dropped_stills"] / max(stats["captured"], 1),
+        "fps": stats["written"] / elapsed,
+        "encode_ms_per_frame": 1000 * stats["encode_s"] / written,
+        "max_queue_depth": stats["max_queue_depth"],
+        "disk_mb_per_s": disk_bytes / elapsed / 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolution", nargs="+", default=["640x480", "1280x720"])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=None,
+                        help="Pace the source at this rate (default: unpaced)")
+    parser.add_argument("--replay", help="Replay this video instead of synthetic frames")
+    args = parser.parse_args()
+
+    for resolution in args.resolution:
+        width, height = (int(v) for v in resolution.split("x"))
+        for save_stills in (False, True):
+            r = run_benchmark(
+                width, height, args.duration, save_stills, args.fps, args.replay
+            )
+            print(
+                f"{r['resolution']:>10} stills={'on ' if save_stills else 'off'} "
+                f"{r['fps']:7.1f} fps  encode {r['encode_ms_per_frame']:.2f} ms/frame  "
+                f"queue<={r['max_queue_depth']}  dropped={r['dropped_video']}  "
+                f"disk {r['disk_mb_per_s']:.1f} MB/s"
+            )
@@ -0,0 +1,175 @@
+"""Shared plumbing for the benchmark suite.
+
+Each benchmark runs in a fresh ``spawn``-ed process so its peak memory is
+its own and not the high-water mark of everything that ran before it.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import pstats
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _top_functions(profiler, top):
+    # The benchmark wrappers would top every listing; keep the code under test
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        if filename.startswith(BENCH_DIR):
+            continue
+        rows.append(
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "tottime_s": tottime,
+                "cumtime_s": cumtime,
+            }
+        )
+    rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+    return rows[:top]
+
+
+def _child(func, args, kwargs, profile, top):
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    result = func(*args, **kwargs)
+    if profiler is not None:
+        profiler.disable()
+    return {
+        "result": result,
+        "wall_s": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+        "profile": _top_functions(profiler, top) if profiler is not None else None,
+    }
+
+
+def run_isolated(func, *args, profile=False, top=15, **kwargs):
+    """Run ``func(*args, **kwargs)`` in a fresh process and measure it.
+
+    Returns ``{"result", "wall_s", "peak_rss_mb", "profile"}``; ``profile``
+    lists the ``top`` functions by cumulative time when ``profile`` is set.
+    ``func`` must be importable (a module-level function).
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_child, func, args, kwargs, profile, top).result()
+
+
+def environment():
+    """Machine and code version the results were measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy
+    import pandas
+
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+    }
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=float)
+
+
+def _metrics(results):
+    """Flatten a results file into ``{(benchmark, case, metric): value}``."""
+    flat = {}
+    for bench, cases in results["benchmarks"].items():
+        for case in cases:
+            for metric, value in case["metrics"].items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    flat[(bench, case["case"], metric)] = value
+    return flat
+
+
+# Direction of each metric the regression check looks at: +1 if larger is
+# better, -1 if smaller is. Exact names win over suffixes; anything not
+# listed (inputs like rows, rate or samples_sent, and load-dependent
+# counts like max_queue_depth or raw drop counts) is descriptive and skipped.
+METRIC_DIRECTIONS = {
+    "elapsed_s": None,  # the requested run length, not a cost
+    "written": 1,
+    "captured": 1,
+    "samples_written": 1,
+    "samples_lost": -1,
+    "peak_rss_mb": -1,
+    "encode_ms_per_frame": -1,
+    "dropped_video_fraction": -1,
+    "dropped_stills_fraction": -1,
+}
+SUFFIX_DIRECTIONS = (("per_s", 1), ("fps", 1), ("_s", -1))
+PREFIX_DIRECTIONS = (("latency_", -1),)
+
+
+def metric_direction(name):
+    """+1 if a larger ``name`` is better, -1 if smaller is, None if neither."""
+    if name in METRIC_DIRECTIONS:
+        return METRIC_DIRECTIONS[name]
+    for suffix, direction in SUFFIX_DIRECTIONS:
+        if name.endswith(suffix):
+            return direction
+    for prefix, direction in PREFIX_DIRECTIONS:
+        if name.startswith(prefix):
+            return direction
+    return None
+
+
+def compare(baseline, current, threshold=0.10):
+    """Metrics that got worse by more than ``threshold`` (a fraction).
+
+    Only metrics with a direction (see ``metric_direction``) are compared.
+    Returns ``[(benchmark, case, metric, old, new, change)]`` where
+    ``change`` is the relative change in the "worse" direction (absolute
+    when the baseline is zero).
+    """
+    old, new = _metrics(baseline), _metrics(current)
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        direction = metric_direction(key[2])
+        before, after = old[key], new[key]
+        if direction is None:
+            continue
+        # From a zero baseline (e.g. no samples lost) the absolute change counts
+        change = -direction * (after - before) / (abs(before) or 1)
+        if change > threshold:
+            regressions.append((*key, before, after, change))
+    return regressions
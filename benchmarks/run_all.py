@@ -0,0 +1,153 @@
+"""End-to-end benchmark suite: acquisition and analysis, fully offline.
+
+Runs the ECG benchmark (simulated sensor), the webcam benchmark (synthetic
+frames) and the analysis benchmark (generated study tables from the real
+27 rows up to 100k) each in its own process, records throughput, latency
+percentiles, peak memory and optionally a per-stage profile, and writes
+everything to one JSON file. Pass an earlier file with ``--compare`` to
+list the metrics that regressed; the exit status is 1 if any did.
+
+    python -m benchmarks.run_all --quick
+    python -m benchmarks.run_all --profile --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+from datetime import datetime
+
+from benchmarks.harness import compare, environment, run_isolated, save_results
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+BENCHMARKS = ("ecg", "webcam", "analysis")
+
+
+def suite(quick=False, sizes=None, mixed_max_rows=20_000, only=BENCHMARKS):
+    """``{benchmark: [(case, func, kwargs)]}`` for one run of the suite.
+
+    Only the modules of the benchmarks in ``only`` are imported, so e.g. the
+    analysis benchmark runs without the acquisition dependencies.
+    """
+    duration = 2.0 if quick else 10.0
+    sizes = sizes or ([27, 1000] if quick else [27, 1000, 10_000, 100_000])
+    repeat = 1 if quick else 3
+    resolutions = [(640, 480)] if quick else [(640, 480), (1280, 720)]
+
+    cases = {bench: [] for bench in only}
+    modules = {
+        bench: importlib.import_module(f"benchmarks.bench_{bench}") for bench in only
+    }
+    if "ecg" in modules:
+        for rate in [128, 512] if quick else [128, 512, 2048]:
+            cases["ecg"].append(
+                (
+                    f"{rate}Hz",
+                    modules["ecg"].run_benchmark,
+                    {"rate": rate, "duration": duration},
+                )
+            )
+    for width, height in resolutions if "webcam" in modules else []:
+        for stills in (False, True):
+            cases["webcam"].append(
+                (
+                    f"{width}x{height}_stills-{'on' if stills else 'off'}",
+                    modules["webcam"].run_benchmark,
+                    {
+                        "width": width,
+                        "height": height,
+                        "duration": duration / 2,
+                        "save_stills": stills,
+                    },
+                )
+            )
+    analysis = modules.get("analysis")
+    for stage in analysis.STAGES if analysis else []:
+        for n_rows in sizes:
+            if stage == "mixed" and n_rows > mixed_max_rows:
+                continue
+            cases["analysis"].append(
+                (
+                    f"{stage}_{n_rows}",
+                    analysis.run_benchmark,
+                    {"n_rows": n_rows, "stage": stage, "repeat": repeat},
+                )
+            )
+    return cases
+
+
+def run_suite(cases, profile=False, top=15):
+    results = {"environment": environment(), "benchmarks": {}}
+    for bench, entries in cases.items():
+        results["benchmarks"][bench] = []
+        for case, func, kwargs in entries:
+            print(f"[{datetime.now()}] {bench}: {case}", flush=True)
+            run = run_isolated(func, profile=profile, top=top, **kwargs)
+            metrics = dict(run["result"])
+            metrics["wall_s"] = run["wall_s"]
+            if run["peak_rss_mb"] is not None:
+                metrics["peak_rss_mb"] = run["peak_rss_mb"]
+            results["benchmarks"][bench].append(
+                {"case": case, "metrics": metrics, "profile": run["profile"]}
+            )
+    return results
+
+
+def print_summary(results):
+    for bench, cases in results["benchmarks"].items():
+        print(f"\n{bench}")
+        for case in cases:
+            m = case["metrics"]
+            headline = [
+                f"{k}={v:.4g}"
+                for k, v in m.items()
+                if k.endswith(("per_s", "fps", "p50", "p50_s", "p99"))
+            ]
+            if m.get("peak_rss_mb") is not None:
+                headline.insert(0, f"rss={m['peak_rss_mb']:.1f}MB")
+            print(f"  {case['case']:<28} wall {m['wall_s']:7.2f}s  " + "  ".join(headline))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change that counts as a regression (default 0.10)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Shorter runs and smaller tables, for a smoke test")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="Study table sizes for the analysis benchmark")
+    parser.add_argument("--mixed-max-rows", type=int, default=20_000,
+                        help="Skip the mixed-model stage above this many rows")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS,
+                        help="Run only these benchmarks")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record the top functions by cumulative time per case")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cases = suite(args.quick, args.sizes, args.mixed_max_rows, args.only)
+    results = run_suite(cases, args.profile, args.top)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    save_results(results, output)
+    print_summary(results)
+    print(f"\nResults written to '{output}'")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against '{args.compare}'")
+        else:
+            print(f"{len(regressions)} regression(s) against '{args.compare}':")
+            for bench, case, metric, before, after, change in regressions:
+                print(f"  {bench}/{case} {metric}: {before:.4g} -> {after:.4g} ({change:+.0%} worse)")
+            sys.exit(1)
@@ -0,0 +1,156 @@
+import asyncio
+import re
+
+import numpy as np
+
+from ecg_packets import (
+    PACKET_DTYPE,
+    PACKET_REFERENCE,
+    PACKET_TYPE,
+    SAMPLES_PER_PACKET,
+)
+
+ECG_LSB_MV = 0.38 * 0.001
+
+
+def synthetic_ecg(
+    n_samples, sampling_rate, heart_rate=70, noise_mv=0.02, seed=None
+):
+    """Generate an ECG-like trace in mV: narrow R-peaks on a noisy baseline."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / sampling_rate
+    beat_period = 60.0 / heart_rate
+    phase = (t % beat_period) - 0.2 * beat_period
+    t_phase = phase - 0.25 * beat_period
+    signal = 1.2 * np.exp(-0.5 * (phase / 0.012) ** 2)  # R wave
+    signal += 0.25 * np.exp(-0.5 * (t_phase / 0.05) ** 2)  # T wave
+    signal += rng.normal(0.0, noise_mv, n_samples)
+    return signal
+
+
+def make_packets(samples_mv, start_ticks=0, sampling_rate=128):
+    """Pack a mV trace into Movesense ``[2, 100, ...]`` notification payloads.
+
+    Each packet carries 16 samples and the sensor's millisecond timestamp of
+    its first sample. A trailing partial packet is discarded.
+    """
+    n_packets = len(samples_mv) // SAMPLES_PER_PACKET
+    records = np.zeros(n_packets, dtype=PACKET_DTYPE)
+    records["type"] = PACKET_TYPE
+    records["reference"] = PACKET_REFERENCE
+    packet_ms = np.arange(n_packets) * SAMPLES_PER_PACKET * 1000.0 / sampling_rate
+    records["timestamp"] = (start_ticks + packet_ms).astype(np.int64) % 2**32
+    counts = np.round(
+        np.asarray(samples_mv[: n_packets * SAMPLES_PER_PACKET]) / ECG_LSB_MV
+    )
+    records["samples"] = counts.astype(np.int32).reshape(
+        n_packets, SAMPLES_PER_PACKET
+    )
+    return [bytearray(r.tobytes()) for r in records]
+
+
+class SimulatedMovesense:
+    """Stand-in for a Movesense sensor that streams ECG notifications.
+
+    ``stream`` calls ``handler(sender, data)`` on the running event loop, the
+    same way bleak delivers notifications. Packets are released in bursts of
+    ``burst`` back-to-back packets, mimicking BLE connection events, and
+    ``drop_rate`` discards a fraction of packets as if lost over the air.
+    """
+
+    def __init__(
+        self,
+        sampling_rate=128,
+        burst=1,
+        drop_rate=0.0,
+        heart_rate=70,
+        seed=None,
+    ):
+        self.sampling_rate = sampling_rate
+        self.burst = burst
+        self.drop_rate = drop_rate
+        self.heart_rate = heart_rate
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.stats = {"packets_sent": 0, "packets_dropped": 0, "samples_sent": 0}
+
+    async def stream(self, handler, duration, stop_event=None):
+        """Emit packets for ``duration`` seconds or until ``stop_event`` is set."""
+        n_samples = int(duration * self.sampling_rate)
+        trace = synthetic_ecg(
+            n_samples, self.sampling_rate, self.heart_rate, seed=self.seed
+        )
+        packets = make_packets(trace, sampling_rate=self.sampling_rate)
+
+        loop = asyncio.get_running_loop()
+        interval = self.burst * SAMPLES_PER_PACKET / self.sampling_rate
+        next_time = loop.time()
+        for start in range(0, len(packets), self.burst):
+            if stop_event is not None and stop_event.is_set():
+                break
+            next_time += interval
+            await asyncio.sleep(max(0.0, next_time - loop.time()))
+            for packet in packets[start : start + self.burst]:
+                if self.drop_rate and self.rng.random() < self.drop_rate:
+                    self.stats["packets_dropped"] += 1
+                    continue
+                handler(self, packet)
+                self.stats["packets_sent"] += 1
+                self.stats["samples_sent"] += SAMPLES_PER_PACKET
+
+
+class SimulatedClient:
+    """Minimal ``BleakClient`` look-alike backed by a ``SimulatedMovesense``.
+
+    Supports the calls ``run_ble_client`` makes: ``start_notify``,
+    ``write_gatt_char`` with a ``/Meas/ECG/<rate>`` subscription or the
+    ``[2, 100]`` unsubscribe, ``stop_notify`` and ``is_connected``.
+    """
+
+    def __init__(self, device, duration=60.0):
+        self.device = device
+        self.duration = duration
+        self.is_connected = False
+        self._handler = None
+        self._task = None
+
+    async def __aenter__(self):
+        self.is_connected = True
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._cancel()
+        self.is_connected = False
+
+    async def start_notify(self, _uuid, handler):
+        self._handler = handler
+
+    async def stop_notify(self, _uuid):
+        await self._cancel()
+        self._handler = None
+
+    async def wait(self):
+        """Wait until the device has streamed its full ``duration``."""
+        if self._task is not None:
+            await self._task
+
+    async def write_gatt_char(self, _uuid, data, response=False):
+        data = bytes(data)
+        if data[:2] == bytes([1, PACKET_REFERENCE]):
+            match = re.search(rb"/Meas/ECG/(\d+)", data)
+            if match:
+                self.device.sampling_rate = int(match.group(1))
+            self._task = asyncio.create_task(
+                self.device.stream(self._handler, self.duration)
+            )
+        elif data[:2] == bytes([2, PACKET_REFERENCE]):
+            await self._cancel()
+
+    async def _cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
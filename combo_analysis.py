@@ -1,26 +1,19 @@
-import pandas as pd
 import numpy as np
-from scipy import stats
-from statsmodels.stats.anova import AnovaRM
 import seaborn as sns
 import matplotlib.pyplot as plt
 
-def combo_analysis():
-    print("Loading data...")
-    try:
-        df = pd.read_excel('data.xlsx')
-    except FileNotFoundError:
-        print("Error: data.xlsx not found.")
-        return
+from resampling import between_groups_test
+from study_data import load_study_table
+
+def combo_analysis(df=None):
+    if df is None:
+        print("Loading data...")
+        try:
+            df = load_study_table('data.xlsx')
+        except FileNotFoundError:
+            print("Error: data.xlsx not found.")
+            return
 
-    # --- Feature Engineering ---
-    df['z_NASA'] = stats.zscore(df['NASA_Total'])
-    df['z_HR'] = stats.zscore(df['Delta_HR'])
-    df['z_Pupil'] = stats.zscore(df['Delta_Pupil_mean'])
-    df['z_Likert'] = stats.zscore(df['LIKERT_Total'])
-    df['Strain_Index'] = (df['z_NASA'] + df['z_HR'] + df['z_Pupil'] + df['z_Likert']) / 4
-    df['Learning_Ease'] = -1 * df['Strain_Index']
-    
     # Create the Interaction Column
     df['Condition'] = "T" + df['Topic'].astype(str) + "_" + df['Modality']
     
@@ -33,16 +26,16 @@ def combo_analysis():
     # Note: With N=27, we have 3 samples per condition. Small, but calculating F-stat is possible.
     
     # One-Way ANOVA (Independent samples assumption for simplicity, or we can treat as different treatments)
-    # Using scipy.stats.f_oneway
-    
-    groups_score = [df[df['Condition'] == c]['Objective_Percent'] for c in df['Condition'].unique()]
-    f_score, p_score = stats.f_oneway(*groups_score)
-    
-    groups_ease = [df[df['Condition'] == c]['Learning_Ease'] for c in df['Condition'].unique()]
-    f_ease, p_ease = stats.f_oneway(*groups_ease)
-    
-    print(f"\nANOVA (Score ~ Condition): F={f_score:.2f}, p={p_score:.4f}")
-    print(f"ANOVA (Ease ~ Condition): F={f_ease:.2f}, p={p_ease:.4f}")
+    # p-values from label permutations, since 3 per group is too few to trust the F distribution
+    score = between_groups_test(df, 'Objective_Percent', 'Condition', seed=0)
+    ease = between_groups_test(df, 'Learning_Ease', 'Condition', seed=0)
+    p_score = score['p_value']
+
+    for label, res in (('Score', score), ('Ease', ease)):
+        # No eta^2 interval when the cells are too small to bootstrap
+        ci = '' if res['eta_sq_ci'] is None else ' [95% BCa {:.3f}, {:.3f}]'.format(*res['eta_sq_ci'])
+        print(f"\nPermutation ANOVA ({label} ~ Condition): F={res['F']:.2f}, p={res['p_value']:.4f}, "
+              f"eta^2={res['eta_sq']:.3f}{ci}")
     
     if p_score < 0.05:
         print("RESULT: Significant difference between specific Topic-Modality combos (Score).")
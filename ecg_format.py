@@ -0,0 +1,196 @@
+import argparse
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+# File layout: a fixed 64-byte header followed by fixed-width little-endian
+# records, one per sample. Records are only ever appended, so a file cut off
+# by a crash is still readable up to its last complete record.
+MAGIC = b"ECGB"
+VERSION = 1
+HEADER_FORMAT = "<4sHHdd32s8x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("raw", "<u4")])
+BINARY_SUFFIX = ".ecg"
+
+
+def _pack_header(sampling_rate, start_time, serial):
+    return struct.pack(
+        HEADER_FORMAT,
+        MAGIC,
+        VERSION,
+        RECORD_DTYPE.itemsize,
+        float(sampling_rate),
+        float(start_time),
+        str(serial).encode("utf-8")[:32],
+    )
+
+
+def _unpack_header(data):
+    magic, version, record_size, sampling_rate, start_time, serial = struct.unpack(
+        HEADER_FORMAT, data
+    )
+    if magic != MAGIC:
+        raise ValueError("Not a binary ECG log (bad magic)")
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(
+            f"Unsupported ECG log version {version} (record size {record_size})"
+        )
+    return {
+        "sampling_rate": sampling_rate,
+        "start_time": start_time,
+        "serial": serial.rstrip(b"\0").decode("utf-8"),
+    }
+
+
+def raw_to_mv(raw):
+    """Scale unsigned raw readings to millivolts, as the CSV logs do."""
+    return np.asarray(raw, dtype="<u4").view("<i4") * 0.38 * 0.001
+
+
+class ECGRecordWriter:
+    """Append ``(timestamp, raw_value, scaled_value)`` rows to a binary log.
+
+    Mirrors ``csv.writer``: it wraps an already open file (opened ``"wb"``)
+    and writes the header on construction. The scaled value is not stored
+    since it is derived from the raw reading.
+    """
+
+    def __init__(self, f, sampling_rate, start_time, serial=""):
+        self.f = f
+        self.f.write(_pack_header(sampling_rate, start_time, serial))
+
+    def writerows(self, rows):
+        records = np.array([(ts, raw) for ts, raw, _ in rows], dtype=RECORD_DTYPE)
+        self.write_records(records)
+
+    def write_records(self, records):
+        self.f.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+
+class ECGRecording:
+    """Memory-mapped reader for binary ECG logs.
+
+    ``timestamps`` and ``raw`` are read-only views on the file; ``window``
+    returns views for a time range without copying.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{self.path} is too short to be a binary ECG log")
+        meta = _unpack_header(header)
+        self.sampling_rate = meta["sampling_rate"]
+        self.start_time = meta["start_time"]
+        self.serial = meta["serial"]
+
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(
+                self.path,
+                dtype=RECORD_DTYPE,
+                mode="r",
+                offset=HEADER_SIZE,
+                shape=(count,),
+            )
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records["timestamp"]
+
+    @property
+    def raw(self):
+        return self.records["raw"]
+
+    @property
+    def mv(self):
+        return raw_to_mv(self.raw)
+
+    def index_range(self, start=None, end=None):
+        """Return the ``[lo, hi)`` record range with ``start <= t < end``."""
+        ts = self.timestamps
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="left"))
+        return lo, hi
+
+    def window(self, start=None, end=None):
+        """Return the records between two host timestamps as a view."""
+        lo, hi = self.index_range(start, end)
+        return self.records[lo:hi]
+
+
+def find_ecg_logs(ecg_dir):
+    """Group a session's ECG logs by sensor, in recording order.
+
+    Returns ``{sensor: [paths]}``. Logs directly in ``ecg_dir`` (a
+    single-sensor session) are under ``""``; the per-sensor folders
+    ``ecg_dir/<serial>`` written when several sensors record at once are
+    each under their serial. Sensors without logs are left out.
+    """
+    ecg_dir = Path(ecg_dir)
+    if not ecg_dir.is_dir():
+        return {}
+    folders = [ecg_dir] + sorted(p for p in ecg_dir.iterdir() if p.is_dir())
+    streams = {}
+    for folder in folders:
+        logs = sorted(
+            p
+            for p in folder.glob("ecg_raw_log_*")
+            if p.suffix in (".csv", BINARY_SUFFIX)
+        )
+        if logs:
+            streams["" if folder == ecg_dir else folder.name] = logs
+    return streams
+
+
+def convert_csv(csv_path, out_path=None, serial="", sampling_rate=128,
+                chunksize=1_000_000):
+    """Convert a CSV ECG log to the binary format, reading it in chunks."""
+    # Imported here so recording (which imports this module) doesn't pay for pandas
+    import pandas as pd
+
+    csv_path = Path(csv_path)
+    out_path = Path(out_path) if out_path else csv_path.with_suffix(BINARY_SUFFIX)
+
+    chunks = pd.read_csv(
+        csv_path,
+        usecols=["timestamp", "raw_value"],
+        dtype={"timestamp": "float64", "raw_value": "int64"},
+        chunksize=chunksize,
+    )
+    with open(out_path, "wb") as f:
+        writer = None
+        for chunk in chunks:
+            if writer is None:
+                start_time = chunk["timestamp"].iloc[0] if len(chunk) else 0.0
+                writer = ECGRecordWriter(f, sampling_rate, start_time, serial)
+            records = np.empty(len(chunk), dtype=RECORD_DTYPE)
+            records["timestamp"] = chunk["timestamp"].to_numpy()
+            records["raw"] = chunk["raw_value"].to_numpy()
+            writer.write_records(records)
+        if writer is None:
+            ECGRecordWriter(f, sampling_rate, 0.0, serial)
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert CSV ECG logs to the binary format."
+    )
+    parser.add_argument("csv_files", nargs="+")
+    parser.add_argument("--serial", default="")
+    parser.add_argument("--sampling-rate", type=float, default=128)
+    args = parser.parse_args()
+
+    for path in args.csv_files:
+        out = convert_csv(path, serial=args.serial, sampling_rate=args.sampling_rate)
+        print(f"Converted {path} -> {out}")
@@ -0,0 +1,113 @@
+import numpy as np
+
+# Movesense ECG notification layout: packet type (2), reference (100),
+# a little-endian uint32 sensor timestamp, then 16 little-endian int32 samples
+PACKET_TYPE = 2
+PACKET_REFERENCE = 100
+SAMPLES_PER_PACKET = 16
+
+PACKET_DTYPE = np.dtype(
+    [
+        ("type", "u1"),
+        ("reference", "u1"),
+        ("timestamp", "<u4"),
+        ("samples", "<i4", (SAMPLES_PER_PACKET,)),
+    ]
+)
+PACKET_SIZE = PACKET_DTYPE.itemsize
+
+
+def is_ecg_packet(data):
+    """Return True if ``data`` is a complete ECG sample notification."""
+    return (
+        len(data) >= PACKET_SIZE
+        and data[0] == PACKET_TYPE
+        and data[1] == PACKET_REFERENCE
+    )
+
+
+def _to_arrays(records):
+    samples = records["samples"].reshape(-1)
+    raw = samples.view("<u4")
+    # Same operation order as the original per-sample scaling
+    mv = samples.astype(np.float64) * 0.38 * 0.001
+    return raw, mv
+
+
+def decode_packet(data):
+    """Decode one notification into ``(timestamp, raw, mv)``.
+
+    ``timestamp`` is the sensor's packet timestamp, ``raw`` the 16 unsigned
+    32-bit readings the CSV logs have always stored and ``mv`` the signed
+    readings scaled to millivolts. Returns None for any packet that is not an
+    ECG sample packet.
+    """
+    if not is_ecg_packet(data):
+        return None
+    records = np.frombuffer(data, dtype=PACKET_DTYPE, count=1)
+    raw, mv = _to_arrays(records)
+    return int(records["timestamp"][0]), raw, mv
+
+
+def decode_packets(packets):
+    """Decode a batch of notifications in one pass.
+
+    Packets that are not ECG sample packets are skipped. Returns
+    ``(timestamps, raw, mv)`` where ``timestamps`` holds one sensor timestamp
+    per decoded packet and ``raw``/``mv`` hold all samples in arrival order.
+    """
+    valid = [bytes(p[:PACKET_SIZE]) for p in packets if is_ecg_packet(p)]
+    records = np.frombuffer(b"".join(valid), dtype=PACKET_DTYPE)
+    raw, mv = _to_arrays(records)
+    return records["timestamp"].astype(np.int64), raw, mv
+
+
+class PacketClock:
+    """Place sensor packet timestamps on the host clock.
+
+    The sensor stamps each packet with a uint32 millisecond counter. Every
+    packet comes with one host clock reading; the smallest host-minus-sensor
+    offset seen so far is the best estimate of the true offset, since
+    transport delay only ever makes the host reading later. Sample times are
+    then spaced at exactly ``1 / sampling_rate`` from the packet time.
+
+    When the estimate drops (the first packets arrived late or in a burst)
+    the offset actually applied follows it by at most half a sample period
+    per packet instead of jumping, and a packet is never placed closer than
+    half a period to the end of the previous one. Logged timestamps thus stay
+    increasing and can be searched as sorted, and they converge on the
+    better offset within seconds.
+    """
+
+    def __init__(self, sampling_rate):
+        self.sampling_rate = sampling_rate
+        self._last_ticks = None
+        self._wraps = 0
+        self._offset = None
+        self._applied = None
+        self._next_time = None
+
+    def packet_time(self, device_ts, host_time):
+        # Unwrap the 32-bit millisecond counter (wraps every ~49.7 days)
+        if self._last_ticks is not None and device_ts < self._last_ticks - 2**31:
+            self._wraps += 1
+        self._last_ticks = device_ts
+        device_s = (device_ts + self._wraps * 2**32) / 1000.0
+
+        offset = host_time - device_s
+        if self._offset is None or offset < self._offset:
+            self._offset = offset
+        if self._applied is None:
+            self._applied = self._offset
+        else:
+            max_step = 0.5 / self.sampling_rate
+            self._applied = max(self._offset, self._applied - max_step)
+        return device_s + self._applied
+
+    def sample_times(self, device_ts, host_time, count=SAMPLES_PER_PACKET):
+        start = self.packet_time(device_ts, host_time)
+        if self._next_time is not None and start < self._next_time:
+            start = self._next_time
+        # Earliest start for the next packet: half a period after this one
+        self._next_time = start + (count - 0.5) / self.sampling_rate
+        return start + np.arange(count) / self.sampling_rate
@@ -0,0 +1,418 @@
+import argparse
+import hashlib
+import json
+import os
+import tarfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from ecg_format import BINARY_SUFFIX, ECGRecording, find_ecg_logs
+from live_ecg import RPeakDetector
+from pupil import measure_pupil, measure_video
+from session_index import SessionIndex
+
+# Bump when the extraction logic changes so cached sessions are recomputed
+EXTRACTOR_VERSION = 3
+SEGMENTS_FILE = "segments.csv"
+FEATURES_FILE = "features.json"
+PUPIL_TRACE_FILE = "pupil_trace.csv"
+PUPIL_SOURCES = ("auto", "video", "stills")
+STILL_SUFFIXES = (".png", ".jpg", ".webp")
+
+
+def session_fingerprint(session_dir, options):
+    """Hash of the session's inputs (names, sizes, mtimes) and the options."""
+    h = hashlib.sha1(json.dumps([EXTRACTOR_VERSION, options]).encode())
+    for sub in (SEGMENTS_FILE, "ecg_logs", "webcam_frames", "video_recordings"):
+        path = Path(session_dir) / sub
+        if path.is_file():
+            entries = [os.stat(path)]
+            names = [sub]
+        elif path.is_dir():
+            # Include the per-sensor folders ecg_logs/<serial> one level down
+            scanned = [(sub, e) for e in os.scandir(path)]
+            for entry in [e for _, e in scanned if e.is_dir()]:
+                scanned += [(f"{sub}/{entry.name}", e) for e in os.scandir(entry.path)]
+            scanned = sorted(
+                ((folder, e) for folder, e in scanned if not e.is_dir()),
+                key=lambda item: (item[0], item[1].name),
+            )
+            entries = [e.stat() for _, e in scanned]
+            names = [f"{folder}/{e.name}" for folder, e in scanned]
+        else:
+            continue
+        for name, st in zip(names, entries):
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def load_segments(session_dir):
+    """Read ``segments.csv``: a ``Topic, Modality, start, end`` row per segment.
+
+    ``start``/``end`` are host timestamps. A row with Topic ``baseline``
+    marks the resting baseline; without one, the start of the recording is
+    used.
+    """
+    segments = pd.read_csv(Path(session_dir) / SEGMENTS_FILE)
+    segments["Topic"] = segments["Topic"].astype(str).str.strip()
+    return segments
+
+
+def load_ecg(session_dir, sensor=None):
+    """Concatenate one sensor's ECG logs into ``(times, mv)`` arrays.
+
+    ``sensor`` is a serial from ``find_ecg_logs`` (``""`` for a
+    single-sensor session); by default the session's first sensor is used.
+    """
+    streams = find_ecg_logs(Path(session_dir, "ecg_logs"))
+    if sensor is None:
+        sensor = next(iter(streams), "")
+    logs = streams.get(sensor, [])
+    times, mv = [], []
+    for path in logs:
+        if path.suffix == BINARY_SUFFIX:
+            recording = ECGRecording(path)
+            times.append(np.asarray(recording.timestamps))
+            mv.append(recording.mv)
+        elif path.suffix == ".csv":
+            df = pd.read_csv(path, usecols=["timestamp", "scaled_value"])
+            times.append(df["timestamp"].to_numpy())
+            mv.append(df["scaled_value"].to_numpy())
+    if not times:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(times), np.concatenate(mv)
+
+
+def detect_beats(times, mv, sampling_rate):
+    """Run the streaming R-peak detector over a whole recording."""
+    detector = RPeakDetector(sampling_rate)
+    beats = []
+    for t, x in zip(times.tolist(), mv.tolist()):
+        beat = detector.update(t, x)
+        if beat is not None:
+            beats.append(beat)
+    return np.asarray(beats)
+
+
+def mean_heart_rate(beats, start, end):
+    """Mean heart rate (bpm) from plausible RR intervals in ``[start, end)``."""
+    window = beats[(beats >= start) & (beats < end)]
+    rr = np.diff(window)
+    rr = rr[(rr >= 60 / 220) & (rr <= 2.0)]
+    return float(60.0 / rr.mean()) if len(rr) else np.nan
+
+
+def _still_timestamp(name):
+    return float(Path(name).stem.split("_", 1)[1])
+
+
+def iter_stills(session_dir):
+    """Yield ``(timestamp, frame)`` for every stored webcam still.
+
+    Reads both one-file-per-image folders and chunked tar archives.
+    """
+    frames_dir = Path(session_dir) / "webcam_frames"
+    if not frames_dir.is_dir():
+        return
+    for path in sorted(frames_dir.iterdir()):
+        if path.suffix in STILL_SUFFIXES:
+            yield _still_timestamp(path.name), cv2.imread(str(path))
+        elif path.suffix == ".tar":
+            with tarfile.open(path) as tar:
+                for member in tar:
+                    data = tar.extractfile(member).read()
+                    frame = cv2.imdecode(
+                        np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR
+                    )
+                    yield _still_timestamp(member.name), frame
+
+
+def pupil_series(session_dir, roi=None):
+    times, ratios = [], []
+    for timestamp, frame in iter_stills(session_dir):
+        if frame is None:
+            continue
+        times.append(timestamp)
+        ratios.append(measure_pupil(frame, roi))
+    return np.asarray(times), np.asarray(ratios)
+
+
+def _nearest(sorted_times, times):
+    """Index of the closest entry of ``sorted_times`` for each of ``times``."""
+    hi = np.clip(np.searchsorted(sorted_times, times), 1, len(sorted_times) - 1)
+    lo = hi - 1
+    closer_lo = np.abs(times - sorted_times[lo]) <= np.abs(sorted_times[hi] - times)
+    return np.where(closer_lo, lo, hi)
+
+
+def video_pupil_series(session_dir, roi=None, workers=1, stride=1):
+    """Per-frame pupil trace of the session's webcam videos.
+
+    Each video is streamed through ``pupil.measure_video`` (split across
+    ``workers`` processes) and every measured frame is stamped with its
+    capture time from the session index. Capture times and ECG sample times
+    are both on the host clock; ``ecg_index`` is the position of the nearest
+    sample in the concatenated ECG timeline of the session's first sensor.
+    """
+    index = SessionIndex.load(session_dir)
+    parts = []
+    for i, video in enumerate(index.videos):
+        times = index.video_times[index.video_starts[i] : index.video_starts[i + 1]]
+        frames, ratios = measure_video(
+            video, roi, workers, stride=stride, n_frames=len(times)
+        )
+        parts.append(
+            pd.DataFrame(
+                {
+                    "video": Path(video).name,
+                    "frame_index": frames,
+                    "timestamp": times[frames],
+                    "pupil": ratios,
+                }
+            )
+        )
+    columns = ["video", "frame_index", "timestamp", "pupil"]
+    trace = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    if len(index.ecg_times) > 1 and len(trace):
+        trace["ecg_index"] = _nearest(index.ecg_times, trace["timestamp"].to_numpy())
+    return trace
+
+
+def _window_mean(times, values, start, end):
+    selected = values[(times >= start) & (times < end)]
+    selected = selected[~np.isnan(selected)]
+    return float(selected.mean()) if len(selected) else np.nan
+
+
+def extract_session(
+    session_dir,
+    sampling_rate=128,
+    baseline_seconds=60,
+    roi=None,
+    pupil_source="auto",
+    pupil_stride=1,
+    pupil_workers=1,
+):
+    """Compute one row of HR and pupil deltas per segment of a session.
+
+    Pupil size is measured on every ``pupil_stride``-th frame of the
+    recorded video, or on the stored stills when ``pupil_source`` is
+    ``"stills"`` (``"auto"`` uses the video when there is one). The video
+    trace is also saved as ``pupil_trace.csv`` in the session folder. A
+    session recorded with several ECG sensors gets one set of rows per
+    sensor, told apart by a ``Sensor`` column holding its serial.
+    """
+    if pupil_source not in PUPIL_SOURCES:
+        raise ValueError(
+            f"pupil_source must be one of {PUPIL_SOURCES}, got {pupil_source!r}"
+        )
+    session_dir = Path(session_dir)
+    segments = load_segments(session_dir)
+    has_video = any((session_dir / "video_recordings").glob("*.avi"))
+    if pupil_source == "video" or (pupil_source == "auto" and has_video):
+        trace = video_pupil_series(session_dir, roi, pupil_workers, pupil_stride)
+        trace.to_csv(session_dir / PUPIL_TRACE_FILE, index=False)
+        pupil_times = trace["timestamp"].to_numpy(dtype=float)
+        pupil_values = trace["pupil"].to_numpy(dtype=float)
+    else:
+        pupil_times, pupil_values = pupil_series(session_dir, roi)
+
+    sensors = list(find_ecg_logs(session_dir / "ecg_logs"))
+    if not sensors:
+        warnings.warn(f"{session_dir}: no ECG logs found, Delta_HR will be NaN")
+        sensors = [""]
+
+    rows = []
+    for sensor in sensors:
+        sensor_rows = _segment_rows(
+            session_dir,
+            segments,
+            load_ecg(session_dir, sensor),
+            pupil_times,
+            pupil_values,
+            sampling_rate,
+            baseline_seconds,
+        )
+        # Several sensors in one session each get their own set of rows
+        if len(sensors) > 1:
+            for row in sensor_rows:
+                row["Sensor"] = sensor
+        rows.extend(sensor_rows)
+    return rows
+
+
+def _segment_rows(
+    session_dir, segments, ecg, pupil_times, pupil_values, sampling_rate, baseline_seconds
+):
+    ecg_times, ecg_mv = ecg
+    beats = detect_beats(ecg_times, ecg_mv, sampling_rate)
+
+    is_baseline = segments["Topic"].str.lower() == "baseline"
+    if is_baseline.any():
+        baseline = segments[is_baseline].iloc[0]
+        base_start, base_end = baseline["start"], baseline["end"]
+    else:
+        base_start = ecg_times[0] if len(ecg_times) else 0.0
+        base_end = base_start + baseline_seconds
+    hr_base = mean_heart_rate(beats, base_start, base_end)
+    pupil_base = _window_mean(pupil_times, pupil_values, base_start, base_end)
+
+    name = session_dir.name
+    participant = int(name) if name.isdigit() else name
+    rows = []
+    for seg in segments[~is_baseline].itertuples(index=False):
+        hr = mean_heart_rate(beats, seg.start, seg.end)
+        pupil = _window_mean(pupil_times, pupil_values, seg.start, seg.end)
+        rows.append(
+            {
+                "ID": participant,
+                "Topic": int(seg.Topic) if seg.Topic.isdigit() else seg.Topic,
+                "Modality": seg.Modality,
+                "HR_mean": hr,
+                "HR_baseline": hr_base,
+                "Delta_HR": hr - hr_base,
+                "Pupil_mean": pupil,
+                "Pupil_baseline": pupil_base,
+                "Delta_Pupil_mean": pupil - pupil_base,
+                "n_beats": int(((beats >= seg.start) & (beats < seg.end)).sum()),
+            }
+        )
+    return rows
+
+
+def _process_session(session_dir, fingerprint, options, pupil_workers=1):
+    rows = extract_session(session_dir, pupil_workers=pupil_workers, **options)
+    with open(Path(session_dir) / FEATURES_FILE, "w") as f:
+        json.dump({"fingerprint": fingerprint, "rows": rows}, f, indent=2)
+    return rows
+
+
+def _cached_rows(session_dir, fingerprint):
+    path = Path(session_dir) / FEATURES_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        cached = json.load(f)
+    return cached["rows"] if cached.get("fingerprint") == fingerprint else None
+
+
+def extract_all(data_dir="data", workers=None, force=False, pupil_workers=1, **options):
+    """Extract features for every session under ``data_dir``.
+
+    Sessions are processed in parallel across a process pool, and each
+    session's video is split across ``pupil_workers`` more. A session
+    whose inputs and options are unchanged since the last run is read back
+    from its ``features.json`` instead of being recomputed.
+    """
+    sessions = sorted(
+        d
+        for d in Path(data_dir).iterdir()
+        if d.is_dir() and (d / SEGMENTS_FILE).exists()
+    )
+    rows, pending = {}, {}
+    for session in sessions:
+        fingerprint = session_fingerprint(session, options)
+        cached = None if force else _cached_rows(session, fingerprint)
+        if cached is not None:
+            rows[session] = cached
+        else:
+            pending[session] = fingerprint
+
+    print(f"{len(sessions)} sessions: {len(rows)} cached, {len(pending)} to process")
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                session: pool.submit(
+                    _process_session, session, fingerprint, options, pupil_workers
+                )
+                for session, fingerprint in pending.items()
+            }
+            for session, future in futures.items():
+                try:
+                    rows[session] = future.result()
+                    print(f"Processed {session}")
+                except Exception as e:
+                    print(f"Error processing {session}: {e}")
+
+    table = [row for session in sessions for row in rows.get(session, [])]
+    return pd.DataFrame(table)
+
+
+def build_table(features, questionnaire=None):
+    """Join extracted features onto the questionnaire/score table, if given.
+
+    Rows are matched on ID, Topic and Modality, and also on Sensor when both
+    tables have it; otherwise each score row gets one row per sensor.
+    """
+    if questionnaire is None:
+        return features
+    if str(questionnaire).endswith(".xlsx"):
+        scores = pd.read_excel(questionnaire)
+    else:
+        scores = pd.read_csv(questionnaire)
+    scores = scores.drop(
+        columns=[c for c in ("Delta_HR", "Delta_Pupil_mean") if c in scores.columns]
+    )
+    keys = ["ID", "Topic", "Modality"]
+    if "Sensor" in scores.columns and "Sensor" in features.columns:
+        keys.append("Sensor")
+    return scores.merge(features, on=keys, how="left")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract per-segment HR and pupil features from session folders."
+    )
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument(
+        "--questionnaire",
+        help="Table with ID, Topic, Modality and the questionnaire/score columns",
+    )
+    parser.add_argument("--output", default="data_features.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    parser.add_argument("--sampling-rate", type=float, default=128)
+    parser.add_argument("--baseline-seconds", type=float, default=60)
+    parser.add_argument(
+        "--eye-roi", help="Fixed eye box x,y,w,h instead of eye detection"
+    )
+    parser.add_argument(
+        "--pupil-source",
+        choices=PUPIL_SOURCES,
+        default="auto",
+        help="Measure pupils on the recorded video or the stored stills",
+    )
+    parser.add_argument(
+        "--pupil-stride", type=int, default=1, help="Measure every Nth video frame"
+    )
+    parser.add_argument(
+        "--pupil-workers",
+        type=int,
+        default=1,
+        help="Processes per session that split its video by frame range",
+    )
+    args = parser.parse_args()
+
+    roi = tuple(int(v) for v in args.eye_roi.split(",")) if args.eye_roi else None
+    features = extract_all(
+        args.data_dir,
+        workers=args.workers,
+        force=args.force,
+        pupil_workers=args.pupil_workers,
+        sampling_rate=args.sampling_rate,
+        baseline_seconds=args.baseline_seconds,
+        roi=roi,
+        pupil_source=args.pupil_source,
+        pupil_stride=args.pupil_stride,
+    )
+    table = build_table(features, args.questionnaire)
+    if args.output.endswith(".xlsx"):
+        table.to_excel(args.output, index=False)
+    else:
+        table.to_csv(args.output, index=False)
+    print(f"Wrote {len(table)} rows to {args.output}")
@@ -0,0 +1,99 @@
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from study_data import CACHE_DIR
+
+MANIFEST_FILE = 'figures.json'
+
+
+def figure_key(renderer, data, params):
+    """Hash of everything that determines a figure's pixels.
+
+    Covers the input rows and columns, the plot parameters and the
+    renderer's source, so editing the plotting code also invalidates it.
+    """
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    h.update(repr(list(data.columns)).encode())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    h.update(inspect.getsource(renderer).encode())
+    return h.hexdigest()
+
+
+def _render(renderer, data, path, params):
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    try:
+        renderer(data, path, **params)
+    finally:
+        plt.close('all')
+    return path
+
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(manifest, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def render_figures(jobs, workers=None, cache_dir=CACHE_DIR, force=False):
+    """Render ``(renderer, data, path, params)`` jobs, skipping unchanged ones.
+
+    ``renderer(data, path, **params)`` must be a module-level function so it
+    can be sent to a worker process, where it runs on the Agg backend. A
+    figure is skipped when its PNG exists and its key matches the one
+    recorded in the cache manifest at its last render. Returns
+    ``{path: 'rendered' | 'cached'}`` in job order.
+    """
+    manifest_path = Path(cache_dir) / MANIFEST_FILE
+    manifest = _load_manifest(manifest_path)
+
+    status, pending = {}, []
+    for renderer, data, path, params in jobs:
+        path = str(path)
+        key = figure_key(renderer, data, params)
+        if not force and manifest.get(path) == key and Path(path).exists():
+            status[path] = 'cached'
+        else:
+            status[path] = 'rendered'
+            pending.append((renderer, data, path, params, key))
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    (pool.submit(_render, renderer, data, path, params), path, key)
+                    for renderer, data, path, params, key in pending
+                ]
+                for future, path, key in futures:
+                    future.result()
+                    manifest[path] = key
+        else:
+            for renderer, data, path, params, key in pending:
+                _render(renderer, data, path, params)
+                manifest[path] = key
+    finally:
+        # Keep the renders that did finish even if another one failed
+        if pending:
+            _save_manifest(manifest, manifest_path)
+    return status
@@ -0,0 +1,262 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+from still_capture import screenshot_to_bgr
+
+_STOP = object()
+MANIFEST_SUFFIX = "_manifest.jsonl"
+
+
+def manifest_path(video_path):
+    """Manifest file of the recording started as ``video_path``."""
+    video_path = Path(video_path)
+    return video_path.with_name(f"{video_path.stem}{MANIFEST_SUFFIX}")
+
+
+def read_manifest(path):
+    """Segment entries of a manifest, in recording order.
+
+    A torn last line (the process died while appending) is ignored.
+    """
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return entries
+
+
+class _Segment:
+    """One open video file of a recording and its ``_frames.csv`` sidecar."""
+
+    def __init__(self, path, number, first_frame, fps, frame_size):
+        self.path = path
+        self.number = number
+        self.first_frame = first_frame
+        self.frames = 0
+        self.start = self.end = None
+        fourcc = cv2.VideoWriter_fourcc(*"XVID")
+        self.writer = cv2.VideoWriter(str(path), fourcc, fps, frame_size)
+        if not self.writer.isOpened():
+            print(f"Error: Could not open video writer for {path}")
+        self.sidecar = open(path.with_name(f"{path.stem}_frames.csv"), "w", newline="")
+        self.rows = csv.writer(self.sidecar)
+        self.rows.writerow(["frame_index", "capture_index", "timestamp"])
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def close(self):
+        self.writer.release()
+        self.sidecar.close()
+
+
+class FramePipeline:
+    """Producer/consumer pipeline for the webcam stream.
+
+    The capture loop only calls ``submit``, which never blocks: frames go
+    into bounded queues and are counted as dropped when a queue is full. One
+    worker thread encodes the video, another grabs a desktop screenshot
+    every ``still_interval`` seconds and hands it, with the matching webcam
+    frame, to ``still_saver`` (a ``still_capture.StillSaver``) for encoding.
+
+    Every frame written to the video is listed with its capture time in a
+    ``<video>_frames.csv`` file next to it, and the video's nominal frame
+    rate is measured from the first ``fps_probe_frames`` frames rather than
+    assumed.
+
+    With ``segment_seconds`` or ``segment_bytes`` set, the recording rolls
+    over to a new file ``<stem>_NNNN.avi`` whenever the current one reaches
+    either limit (bytes as flushed to disk so far, so a segment may
+    overshoot by the writer's buffer), so a crash costs at most the open
+    segment. Each finished segment is appended (and fsynced) to
+    ``<stem>_manifest.jsonl`` with its first frame, frame count, first/last
+    capture time and size.
+    """
+
+    def __init__(
+        self,
+        video_path,
+        frame_size,
+        still_saver=None,
+        screenshot=None,
+        still_interval=0.2,
+        queue_size=128,
+        still_queue_size=8,
+        fps_probe_frames=30,
+        default_fps=30,
+        segment_seconds=None,
+        segment_bytes=None,
+    ):
+        self.video_path = Path(video_path)
+        self.manifest_path = manifest_path(self.video_path)
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.rotating = bool(segment_seconds or segment_bytes)
+        self.frame_size = frame_size
+        self.still_saver = still_saver
+        self.screenshot = screenshot
+        self.still_interval = still_interval
+        self.fps_probe_frames = fps_probe_frames
+        self.default_fps = default_fps
+        self.fps = None
+
+        self.video_queue = queue.Queue(maxsize=queue_size)
+        self.still_queue = queue.Queue(maxsize=still_queue_size)
+        self.stats = {
+            "captured": 0,
+            "written": 0,
+            "dropped_video": 0,
+            "stills": 0,
+            "dropped_stills": 0,
+            "max_queue_depth": 0,
+            "encode_s": 0.0,
+            "segments": 0,
+        }
+        self._last_still_time = time.time()
+        self._workers = [
+            threading.Thread(target=self._video_worker, name="video-encoder"),
+            threading.Thread(target=self._still_worker, name="still-encoder"),
+        ]
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, frame, timestamp):
+        """Queue a captured frame without blocking the capture loop."""
+        index = self.stats["captured"]
+        self.stats["captured"] += 1
+        try:
+            self.video_queue.put_nowait((index, timestamp, frame))
+        except queue.Full:
+            self.stats["dropped_video"] += 1
+        depth = self.video_queue.qsize()
+        if depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = depth
+
+        # Capture every still_interval seconds
+        still_due = timestamp - self._last_still_time >= self.still_interval
+        if self.still_saver is not None and still_due:
+            self._last_still_time = timestamp
+            try:
+                self.still_queue.put_nowait((timestamp, frame))
+            except queue.Full:
+                self.stats["dropped_stills"] += 1
+
+    def stop(self):
+        """Drain the queues, stop the workers and return the frame counts."""
+        self.video_queue.put(_STOP)
+        self.still_queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        stats = dict(self.stats, fps=self.fps)
+        if self.still_saver is not None:
+            saver_stats = self.still_saver.close()
+            stats["dropped_stills"] += saver_stats["dropped"]
+            stats["still_bytes"] = saver_stats["bytes"]
+            stats["still_encode_s"] = saver_stats["encode_s"]
+        return stats
+
+    def _measure_fps(self, probe):
+        span = probe[-1][1] - probe[0][1] if len(probe) > 1 else 0
+        if span <= 0:
+            return self.default_fps
+        # Round and cap so the container timebase stays within what MPEG-4
+        # accepts (denominator <= 65535)
+        return min(round((len(probe) - 1) / span, 2), 600.0)
+
+    def _segment_full(self, segment, timestamp):
+        if self.segment_seconds and timestamp - segment.start >= self.segment_seconds:
+            return True
+        return bool(self.segment_bytes) and segment.size() >= self.segment_bytes
+
+    def _open_segment(self):
+        number = self.stats["segments"]
+        path = self.video_path
+        if self.rotating:
+            path = path.with_name(f"{path.stem}_{number:04d}{path.suffix}")
+        self.stats["segments"] += 1
+        return _Segment(path, number, self.stats["written"], self.fps, self.frame_size)
+
+    def _close_segment(self, segment):
+        segment.close()
+        entry = {
+            "file": segment.path.name,
+            "segment": segment.number,
+            "first_frame": segment.first_frame,
+            "frames": segment.frames,
+            "start": segment.start,
+            "end": segment.end,
+            "bytes": segment.size(),
+            "fps": self.fps,
+        }
+        # One line per finished segment; synced so it survives a crash
+        with open(self.manifest_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write(self, segment, item):
+        capture_index, timestamp, frame = item
+        if segment is not None and self._segment_full(segment, timestamp):
+            self._close_segment(segment)
+            segment = None
+        if segment is None:
+            segment = self._open_segment()
+            segment.start = timestamp
+        start = time.perf_counter()
+        segment.writer.write(frame)
+        self.stats["encode_s"] += time.perf_counter() - start
+        segment.rows.writerow([segment.frames, capture_index, timestamp])
+        segment.frames += 1
+        segment.end = timestamp
+        self.stats["written"] += 1
+        return segment
+
+    def _video_worker(self):
+        segment = None
+        probe = []
+        while True:
+            item = self.video_queue.get()
+            if item is not _STOP and self.fps is None:
+                probe.append(item)
+                if len(probe) < self.fps_probe_frames:
+                    continue
+            if self.fps is None and probe:
+                self.fps = self._measure_fps(probe)
+                pending, probe = probe, []
+            else:
+                pending = [] if item is _STOP else [item]
+            for queued in pending:
+                segment = self._write(segment, queued)
+            if item is _STOP:
+                break
+
+        if segment is not None:
+            self._close_segment(segment)
+
+    def _still_worker(self):
+        while True:
+            item = self.still_queue.get()
+            if item is _STOP:
+                break
+            timestamp, frame = item
+
+            if self.screenshot is not None:
+                screenshot = screenshot_to_bgr(self.screenshot())
+                self.still_saver.submit("screenshots", timestamp, screenshot)
+            if self.still_saver.submit("webcam_frames", timestamp, frame):
+                self.stats["stills"] += 1
@@ -0,0 +1,112 @@
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+class _PacedSource:
+    """Shared ``cv2.VideoCapture``-style interface for offline frame sources.
+
+    Sources implement ``_next_frame``; ``read`` paces them at ``fps`` when it
+    is set and otherwise returns frames as fast as they can be produced.
+    """
+
+    def __init__(self, width, height, fps=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._opened = True
+        self._next_time = None
+
+    def isOpened(self):
+        return self._opened
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        return 0.0
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        if self.fps:
+            now = time.perf_counter()
+            if self._next_time is None:
+                self._next_time = now
+            self._next_time += 1.0 / self.fps
+            if self._next_time > now:
+                time.sleep(self._next_time - now)
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def release(self):
+        self._opened = False
+
+
+class SyntheticSource(_PacedSource):
+    """Generate moving BGR test frames without a camera.
+
+    Frames are drawn from a small pool of pre-rendered noise images with a
+    moving bar, so generation cost stays negligible next to encoding.
+    """
+
+    def __init__(self, width=640, height=480, fps=None, n_frames=None, seed=0):
+        super().__init__(width, height, fps)
+        self.n_frames = n_frames
+        self._index = 0
+        rng = np.random.default_rng(seed)
+        self._pool = [
+            rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+            for _ in range(8)
+        ]
+
+    def _next_frame(self):
+        if self.n_frames is not None and self._index >= self.n_frames:
+            return None
+        frame = self._pool[self._index % len(self._pool)].copy()
+        x = (self._index * 8) % self.width
+        frame[:, x : x + 16] = 255
+        self._index += 1
+        return frame
+
+
+class ReplaySource(_PacedSource):
+    """Replay a recorded video file as if it were a live camera."""
+
+    def __init__(self, path, fps=None, loop=False):
+        self._cap = cv2.VideoCapture(str(path))
+        super().__init__(
+            int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            fps,
+        )
+        self._opened = self._cap.isOpened()
+        self.loop = loop
+
+    def _next_frame(self):
+        ret, frame = self._cap.read()
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        return frame if ret else None
+
+    def release(self):
+        super().release()
+        self._cap.release()
+
+
+def synthetic_screenshot(width=1920, height=1080):
+    """Return a ``pyautogui.screenshot``-style callable producing test images."""
+    image = Image.new("RGB", (width, height), (32, 96, 160))
+
+    def screenshot():
+        return image.copy()
+
+    return screenshot
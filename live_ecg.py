@@ -0,0 +1,213 @@
+import csv
+from collections import deque
+
+import numpy as np
+
+
+class ECGRingBuffer:
+    """Fixed-size, preallocated buffer of the most recent ECG samples."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros(capacity)
+        self.count = 0  # total samples ever written
+        self._pos = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def extend(self, times, values):
+        n = len(values)
+        if n >= self.capacity:
+            times, values = times[-self.capacity :], values[-self.capacity :]
+            n = self.capacity
+        end = self._pos + n
+        if end <= self.capacity:
+            self.times[self._pos : end] = times
+            self.values[self._pos : end] = values
+        else:
+            split = self.capacity - self._pos
+            self.times[self._pos :] = times[:split]
+            self.values[self._pos :] = values[:split]
+            self.times[: end - self.capacity] = times[split:]
+            self.values[: end - self.capacity] = values[split:]
+        self._pos = end % self.capacity
+        self.count += len(values)
+
+    def latest(self, n=None):
+        """Return the last ``n`` samples as ``(times, values)`` in time order."""
+        n = len(self) if n is None else min(n, len(self))
+        idx = (self._pos - n + np.arange(n)) % self.capacity
+        return self.times[idx], self.values[idx]
+
+
+class RPeakDetector:
+    """Streaming R-peak detector with constant work per sample.
+
+    A reduced Pan-Tompkins chain: a two-sample derivative, squaring, and a
+    150 ms moving-window integral compared against an adaptive threshold
+    between running signal and noise peak levels. The beat is placed at the
+    largest raw sample in a short history ending at the integrator's
+    crossing, which costs one search of that history per beat.
+    """
+
+    def __init__(self, sampling_rate, refractory=0.25, learning_time=2.0):
+        self.sampling_rate = sampling_rate
+        self.refractory = refractory
+        self.window = max(1, round(0.15 * sampling_rate))
+        self._learning = round(learning_time * sampling_rate)
+        self._mwi_ring = np.zeros(self.window)
+        self._mwi_pos = 0
+        self._mwi_sum = 0.0
+        self._recent = ECGRingBuffer(3 * self.window)
+        self._prev = [0.0, 0.0]
+        self._seen = 0
+        self._learn_max = 0.0
+        self.signal_peak = 0.0
+        self.noise_peak = 0.0
+        self._region_len = 0
+        self._region_max = 0.0
+        self._last_beat = None
+        self._last_decay = None
+
+    @property
+    def threshold(self):
+        return self.noise_peak + 0.25 * (self.signal_peak - self.noise_peak)
+
+    def update(self, t, x):
+        """Feed one sample; returns the beat time when one is confirmed."""
+        self._recent.extend((t,), (x,))
+        derivative = x - self._prev[0]
+        self._prev = [self._prev[1], x]
+        squared = derivative * derivative
+        self._mwi_sum += squared - self._mwi_ring[self._mwi_pos]
+        self._mwi_ring[self._mwi_pos] = squared
+        self._mwi_pos = (self._mwi_pos + 1) % self.window
+        mwi = self._mwi_sum / self.window
+        self._seen += 1
+
+        if self._seen <= self._learning:
+            self._learn_max = max(self._learn_max, mwi)
+            if self._seen == self._learning:
+                self.signal_peak = 0.5 * self._learn_max
+            return None
+
+        # Let the threshold fall back if the signal got weaker (e.g. after
+        # an electrode moved) rather than missing every following beat
+        if self._last_beat is not None:
+            quiet_since = max(self._last_beat, self._last_decay or self._last_beat)
+            if t - quiet_since > 2.0:
+                self.signal_peak *= 0.5
+                self._last_decay = t
+
+        if mwi > self.threshold:
+            self._region_len += 1
+            self._region_max = max(self._region_max, mwi)
+            return None
+        if self._region_len == 0:
+            return None
+
+        # The integrator just fell back below threshold: classify the region
+        peak, length = self._region_max, self._region_len
+        self._region_len = 0
+        self._region_max = 0.0
+        times, values = self._recent.latest(length + self.window)
+        beat_time = float(times[int(np.argmax(values))])
+        last = self._last_beat
+        if last is not None and beat_time - last < self.refractory:
+            self.noise_peak = 0.125 * peak + 0.875 * self.noise_peak
+            return None
+        self.signal_peak = 0.125 * peak + 0.875 * self.signal_peak
+        self._last_beat = beat_time
+        return beat_time
+
+
+class HeartRateMonitor:
+    """Live heart rate from a stream of ECG packets.
+
+    Samples go into a preallocated ring buffer of ``buffer_seconds``; the
+    R-peak detector runs over each new sample and the heart rate is the mean
+    of the last ``window_beats`` plausible RR intervals. When ``trace_path``
+    is given, every beat is appended there as ``timestamp, rr_s, hr_bpm``.
+    """
+
+    def __init__(
+        self,
+        sampling_rate,
+        buffer_seconds=10,
+        window_beats=8,
+        max_beat_gap=3.0,
+        trace_path=None,
+    ):
+        self.sampling_rate = sampling_rate
+        self.max_beat_gap = max_beat_gap
+        self.buffer = ECGRingBuffer(int(buffer_seconds * sampling_rate))
+        self.detector = RPeakDetector(sampling_rate)
+        self._rr = deque(maxlen=window_beats)
+        self._rr_sum = 0.0
+        self.beats = 0
+        self.rejected_beats = 0
+        self.last_beat = None
+        self.last_time = None
+
+        self._trace_file = None
+        if trace_path is not None:
+            self._trace_file = open(trace_path, "w", newline="")
+            self._trace = csv.writer(self._trace_file)
+            self._trace.writerow(["timestamp", "rr_s", "hr_bpm"])
+
+    @property
+    def heart_rate(self):
+        """Rolling heart rate in bpm, or None before two beats are seen."""
+        if not self._rr:
+            return None
+        return float(60.0 * len(self._rr) / self._rr_sum)
+
+    def add_samples(self, times, values):
+        self.buffer.extend(times, values)
+        for t, x in zip(times, values):
+            beat = self.detector.update(t, x)
+            if beat is not None:
+                self._add_beat(beat)
+        if len(values):
+            self.last_time = float(times[-1])
+
+    def _add_beat(self, beat):
+        if self.last_beat is not None:
+            rr = beat - self.last_beat
+            if 60 / 220 <= rr <= 2.0:
+                if len(self._rr) == self._rr.maxlen:
+                    self._rr_sum -= self._rr[0]
+                self._rr.append(rr)
+                self._rr_sum += rr
+                if self._trace_file is not None:
+                    self._trace.writerow([beat, rr, 60.0 / rr])
+            else:
+                self.rejected_beats += 1
+        self.beats += 1
+        self.last_beat = beat
+
+    def status(self):
+        """Heart rate and a simple electrode-contact check for operators."""
+        since_beat = None
+        if self.last_time is not None and self.last_beat is not None:
+            since_beat = self.last_time - self.last_beat
+        _, values = self.buffer.latest()
+        flat = len(values) > 0 and float(np.ptp(values)) < 0.05
+        contact_ok = (
+            not flat and since_beat is not None and since_beat <= self.max_beat_gap
+        )
+        return {
+            "heart_rate": self.heart_rate,
+            "beats": self.beats,
+            "rejected_beats": self.rejected_beats,
+            "seconds_since_beat": since_beat,
+            "contact_ok": contact_ok,
+        }
+
+    def close(self):
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+
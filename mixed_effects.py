@@ -0,0 +1,179 @@
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from patsy import dmatrix
+from scipy import stats
+from statsmodels.regression.mixed_linear_model import MixedLM
+
+from study_data import load_study_table
+
+OUTCOMES = [
+    'Objective_Percent', 'Learning_Ease', 'Strain_Index',
+    'z_NASA', 'z_HR', 'z_Pupil', 'z_Likert',
+]
+# Sum-to-zero contrasts, so the Wald test of each factor is its type-III
+# main effect averaged over the other factor, not its effect at the other
+# factor's reference level
+FIXED_EFFECTS = 'C(Modality, Sum) * C(Topic, Sum)'
+RESULTS_COLUMNS = [
+    'outcome', 'kind', 'term', 'estimate', 'std_err', 'statistic', 'df',
+    'p_value', 'ci_low', 'ci_high', 'n_obs', 'n_groups', 'converged', 'boundary',
+]
+Z_95 = stats.norm.ppf(0.975)
+
+
+def _independent_columns(X):
+    """Indices of the columns of ``X`` not spanned by the columns before them.
+
+    An empty Modality x Topic cell leaves its interaction column all zero
+    (or a combination of others), which would make the fit singular.
+    """
+    diag = np.abs(np.diag(np.linalg.qr(X, mode='r')))
+    tol = diag.max() * max(X.shape) * np.finfo(float).eps
+    return np.flatnonzero(diag > tol)
+
+
+def _fit_outcome(outcome, y, exog, groups, terms, names):
+    """Fit one outcome on the shared design and return its result rows."""
+    keep = ~np.isnan(y)
+    cols = _independent_columns(exog[keep]) if keep.any() else np.arange(exog.shape[1])
+    if keep.sum() <= len(cols):
+        return [{
+            'outcome': outcome, 'kind': 'skipped', 'term': 'too few observations',
+            'n_obs': int(keep.sum()), 'converged': False, 'boundary': False,
+        }]
+    # Refer everything to the columns actually fitted
+    position = {c: i for i, c in enumerate(cols)}
+    names = [names[c] for c in cols]
+    terms = {
+        term: [position[c] for c in term_cols if c in position]
+        for term, term_cols in terms.items()
+    }
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            result = MixedLM(y[keep], exog[keep][:, cols], groups[keep]).fit(reml=True)
+    except (np.linalg.LinAlgError, ValueError) as e:
+        return [{
+            'outcome': outcome, 'kind': 'failed', 'term': str(e) or type(e).__name__,
+            'n_obs': int(keep.sum()), 'converged': False, 'boundary': False,
+        }]
+    common = {
+        'outcome': outcome,
+        'n_obs': int(keep.sum()),
+        'n_groups': int(len(np.unique(groups[keep]))),
+        'converged': bool(result.converged),
+        'boundary': any('boundary' in str(w.message).lower() for w in caught),
+    }
+
+    params = np.asarray(result.fe_params)
+    cov = np.asarray(result.cov_params())[:len(params), :len(params)]
+    se = np.sqrt(np.diag(cov))
+    z = params / se
+    rows = []
+    for i, name in enumerate(names):
+        rows.append(dict(
+            common, kind='coefficient', term=name, estimate=params[i],
+            std_err=se[i], statistic=z[i], df=1,
+            p_value=2 * stats.norm.sf(abs(z[i])),
+            ci_low=params[i] - Z_95 * se[i], ci_high=params[i] + Z_95 * se[i],
+        ))
+
+    # Omnibus Wald chi-square per model term (all of its dummy columns at once)
+    for term, cols in terms.items():
+        if not cols:
+            continue
+        b = params[cols]
+        try:
+            chi2 = float(b @ np.linalg.solve(cov[np.ix_(cols, cols)], b))
+        except np.linalg.LinAlgError:
+            chi2 = np.nan
+        rows.append(dict(
+            common, kind='wald', term=term, statistic=chi2, df=len(b),
+            p_value=stats.chi2.sf(chi2, len(b)),
+        ))
+
+    rows.append(dict(
+        common, kind='variance', term='Group Var', estimate=float(np.asarray(result.cov_re)[0, 0]),
+    ))
+    rows.append(dict(common, kind='variance', term='Residual', estimate=float(result.scale)))
+    return rows
+
+
+def fit_mixed_models(df, outcomes=OUTCOMES, fixed=FIXED_EFFECTS, group='ID', workers=1):
+    """Fit ``outcome ~ fixed + (1 | group)`` for every outcome.
+
+    The fixed-effects design is built once and shared by all outcomes, so
+    each outcome only costs its own REML fit; missing outcome values are
+    dropped per outcome and unbalanced cells are fine. With ``workers`` > 1
+    the fits run in a process pool. Returns one long table with a row per
+    coefficient, per omnibus Wald test of each model term and per variance
+    component. With the default sum-coded design the coefficients are
+    deviations from the grand mean and the Wald rows are type-III tests.
+    Design columns an outcome's rows can't estimate (an empty Modality x
+    Topic cell) are dropped for that outcome, so its coefficients and Wald
+    ``df`` cover only the estimable ones; an outcome whose fit still fails
+    gets a single ``kind='failed'`` row instead of stopping the others.
+
+    ``converged`` is False when the optimizer's final fit did not converge;
+    don't trust that outcome's estimates. ``boundary`` is True when the
+    participant variance was estimated at zero (no detectable between-
+    participant spread beyond the residual): the fit is still valid and
+    its fixed effects are close to ordinary least squares.
+    """
+    data = df.dropna(subset=[group])
+    design = dmatrix(fixed, data, return_type='dataframe', NA_action='raise')
+    info = design.design_info
+    terms = {
+        name: list(range(sl.start, sl.stop))
+        for name, sl in info.term_name_slices.items()
+        if name != 'Intercept'
+    }
+    exog = design.to_numpy()
+    groups = data[group].to_numpy()
+    outcomes = [o for o in outcomes if o in data.columns]
+    jobs = [
+        (o, data[o].to_numpy(dtype=float), exog, groups, terms, list(design.columns))
+        for o in outcomes
+    ]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            parts = list(pool.map(_fit_outcome, *zip(*jobs)))
+    else:
+        parts = [_fit_outcome(*job) for job in jobs]
+    return pd.DataFrame([row for part in parts for row in part], columns=RESULTS_COLUMNS)
+
+
+def mixed_effects_analysis(df=None, output='mixed_effects_results.csv', workers=1):
+    if df is None:
+        print("Loading data...")
+        try:
+            df = load_study_table('data.xlsx')
+        except FileNotFoundError:
+            print("Error: data.xlsx not found.")
+            return
+
+    results = fit_mixed_models(df, workers=workers)
+    results.to_csv(output, index=False)
+    print(f"Wrote {len(results)} rows for {results['outcome'].nunique()} outcomes to '{output}'")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fit mixed-effects models for every outcome metric."
+    )
+    parser.add_argument('--data', default='data.xlsx')
+    parser.add_argument('--output', default='mixed_effects_results.csv')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    try:
+        table = load_study_table(args.data)
+    except FileNotFoundError:
+        print(f"Error: {args.data} not found.")
+    else:
+        mixed_effects_analysis(table, args.output, args.workers)
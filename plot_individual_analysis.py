@@ -1,81 +1,113 @@
-import pandas as pd
+import math
+
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
-
-def plot_individual_analysis():
-    print("Loading data...")
-    try:
-        df = pd.read_excel('data.xlsx')
-    except FileNotFoundError:
-        print("Error: data.xlsx not found.")
-        return
-
-    # --- Feature Engineering (Ease) ---
-    df['z_NASA'] = stats.zscore(df['NASA_Total'])
-    df['z_HR'] = stats.zscore(df['Delta_HR'])
-    df['z_Pupil'] = stats.zscore(df['Delta_Pupil_mean'])
-    df['z_Likert'] = stats.zscore(df['LIKERT_Total'])
-    df['Strain_Index'] = (df['z_NASA'] + df['z_HR'] + df['z_Pupil'] + df['z_Likert']) / 4
-    df['Learning_Ease'] = -1 * df['Strain_Index']
-
-    # Set style
-    sns.set_theme(style="whitegrid")
 
-    # --- PLOT 1: SMALL MULTIPLES (3x3 Grid) ---
+from figure_cache import render_figures
+from study_data import load_study_table
+
+GRID_COLUMNS = 3
+PER_PAGE = 9  # participants per page of the profile grid
+PLOT_COLUMNS = ['ID', 'Modality', 'Objective_Percent', 'Learning_Ease']
+
+
+def render_profile_page(page_data, path, columns=GRID_COLUMNS):
+    # --- PLOT 1: SMALL MULTIPLES (one page of the grid) ---
     # One subplot per Participant
     # Bar = Objective Score (Left Axis)
     # Line = Learning Ease (Right Axis)
-    
-    unique_ids = df['ID'].unique()
-    fig, axes = plt.subplots(3, 3, figsize=(15, 12))
+    sns.set_theme(style="whitegrid")
+
+    unique_ids = page_data['ID'].unique()
+    rows = math.ceil(len(unique_ids) / columns)
+    fig, axes = plt.subplots(rows, columns, figsize=(5 * columns, 4 * rows), squeeze=False)
     axes = axes.flatten()
-    
+
     for i, pid in enumerate(unique_ids):
         ax1 = axes[i]
-        p_data = df[df['ID'] == pid]
-        
+        p_data = page_data[page_data['ID'] == pid]
+
         # Plot Score (Bar)
         sns.barplot(x='Modality', y='Objective_Percent', data=p_data, ax=ax1, palette='pastel', alpha=0.7)
         ax1.set_ylim(0, 100)
         ax1.set_ylabel('Score (%)')
         ax1.set_title(f'Participant {pid}')
-        
+
         # Plot Ease (Line/Point) on secondary axis
         ax2 = ax1.twinx()
         sns.pointplot(x='Modality', y='Learning_Ease', data=p_data, ax=ax2, color='red', markers='o', scale=0.7)
         ax2.set_ylabel('Ease (Z-Score)', color='red')
         ax2.tick_params(axis='y', labelcolor='red')
-        
-        # Add simple "Best" annotation
-        best_mod = p_data.loc[p_data['Objective_Percent'].idxmax(), 'Modality']
-        # ax1.text(0.5, 90, f"Best: {best_mod}", ha='center', transform=ax1.transData)
+
+    # Blank the unused cells of a partly filled last page
+    for ax in axes[len(unique_ids):]:
+        ax.set_visible(False)
 
     plt.tight_layout()
-    plt.savefig('plot_individual_profiles_grid.png')
-    print("Generated 'plot_individual_profiles_grid.png'")
+    plt.savefig(path)
     plt.close()
 
+
+def render_ease_scatter(data, path):
     # --- PLOT 2: SCATTER (Colored by Participant) ---
     # Showing that Ease predicts Score for everyone
-    
+    sns.set_theme(style="whitegrid")
+
     plt.figure(figsize=(10, 7))
-    # Using a categorical palette for 9 participants
-    sns.scatterplot(x='Learning_Ease', y='Objective_Percent', hue='ID', data=df, palette='tab10', s=120, legend='full')
-    
+    # tab10 only has 10 colours; switch to a continuous palette beyond that
+    palette = 'tab10' if data['ID'].nunique() <= 10 else 'husl'
+    sns.scatterplot(x='Learning_Ease', y='Objective_Percent', hue='ID', data=data, palette=palette, s=120, legend='full')
+
     # Add a single regression line for the whole group to show the trend
-    sns.regplot(x='Learning_Ease', y='Objective_Percent', data=df, scatter=False, color='black', line_kws={'linestyle': '--', 'linewidth': 1.5})
-    
+    sns.regplot(x='Learning_Ease', y='Objective_Percent', data=data, scatter=False, color='black', line_kws={'linestyle': '--', 'linewidth': 1.5})
+
     plt.title('Learning Ease vs. Performance (Color by Participant)')
     plt.xlabel('Learning Ease (Composite Z-Score)')
     plt.ylabel('Objective Score (%)')
     plt.legend(title='Participant ID', bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.tight_layout()
-    plt.savefig('plot_ease_score_by_participant.png')
-    print("Generated 'plot_ease_score_by_participant.png'")
+    plt.savefig(path)
     plt.close()
 
+
+def profile_pages(df, per_page=PER_PAGE):
+    """Split the table into ``(path, rows)`` pages of ``per_page`` participants.
+
+    The first page keeps the original file name; later ones are numbered.
+    """
+    unique_ids = df['ID'].unique()
+    pages = []
+    for n, first in enumerate(range(0, len(unique_ids), per_page), start=1):
+        ids = unique_ids[first:first + per_page]
+        suffix = '' if n == 1 else f'_{n}'
+        pages.append((f'plot_individual_profiles_grid{suffix}.png', df[df['ID'].isin(ids)]))
+    return pages
+
+
+def plot_individual_analysis(df=None, per_page=PER_PAGE, workers=None, force=False):
+    if df is None:
+        print("Loading data...")
+        try:
+            df = load_study_table('data.xlsx')
+        except FileNotFoundError:
+            print("Error: data.xlsx not found.")
+            return
+
+    # Only the plotted columns go into the cache key
+    data = df[PLOT_COLUMNS].reset_index(drop=True)
+    jobs = [
+        (render_profile_page, page.reset_index(drop=True), path, {})
+        for path, page in profile_pages(data, per_page)
+    ]
+    jobs.append((render_ease_scatter, data, 'plot_ease_score_by_participant.png', {}))
+
+    status = render_figures(jobs, workers=workers, force=force)
+    for path, state in status.items():
+        if state == 'rendered':
+            print(f"Generated '{path}'")
+        else:
+            print(f"Unchanged '{path}' (cached)")
+
 if __name__ == "__main__":
     plot_individual_analysis()
-
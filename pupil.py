@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+EYE_CASCADE_FILE = "haarcascade_eye.xml"
+
+_eye_cascade = None
+
+
+def _get_eye_cascade():
+    global _eye_cascade
+    if _eye_cascade is None:
+        # Some OpenCV builds (e.g. 5.x) drop the objdetect cascades entirely
+        if not hasattr(cv2, "CascadeClassifier") or not hasattr(cv2, "data"):
+            raise RuntimeError(
+                f"OpenCV {cv2.__version__} has no Haar cascade support; install "
+                "an OpenCV build that ships the Haar cascades or pass a fixed "
+                "eye ROI (--eye-roi)"
+            )
+        path = cv2.data.haarcascades + EYE_CASCADE_FILE
+        cascade = cv2.CascadeClassifier(path)
+        if cascade.empty():
+            raise RuntimeError(
+                f"Could not load {path}; install an OpenCV build that ships the "
+                "Haar cascades or pass a fixed eye ROI (--eye-roi)"
+            )
+        _eye_cascade = cascade
+    return _eye_cascade
+
+
+def find_eyes(gray, max_eyes=2):
+    """Return up to ``max_eyes`` eye boxes ``(x, y, w, h)``, largest first."""
+    eyes = _get_eye_cascade().detectMultiScale(
+        gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20)
+    )
+    eyes = sorted((tuple(e) for e in eyes), key=lambda e: e[2] * e[3], reverse=True)
+    return eyes[:max_eyes]
+
+
+def pupil_ratio(eye_gray):
+    """Pupil diameter as a fraction of the eye box width, or NaN.
+
+    The pupil is taken as the largest dark blob near the middle of the box:
+    pixels well below the box's median brightness are thresholded and the
+    blob's equivalent circular diameter is measured. Normalising by the box width makes the
+    value insensitive to the distance from the camera.
+    """
+    h, w = eye_gray.shape
+    if h < 8 or w < 8:
+        return np.nan
+    blurred = cv2.GaussianBlur(eye_gray, (5, 5), 0)
+    darkest, median = float(blurred.min()), float(np.median(blurred))
+    if median - darkest < 10:
+        return np.nan
+    mask = (blurred <= darkest + 0.3 * (median - darkest)).astype(np.uint8)
+    contours, _ = cv2.findContours(
+        mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+    )
+
+    best_area = 0.0
+    for contour in contours:
+        x, y, cw, ch = cv2.boundingRect(contour)
+        cx, cy = x + cw / 2, y + ch / 2
+        # Ignore eyebrows and shadows at the edges of the box
+        if not (0.2 * w <= cx <= 0.8 * w and 0.2 * h <= cy <= 0.8 * h):
+            continue
+        best_area = max(best_area, cv2.contourArea(contour))
+    if best_area <= 0:
+        return np.nan
+    return float(np.sqrt(4 * best_area / np.pi) / w)
+
+
+def measure_pupil(frame, roi=None):
+    """Mean pupil ratio over the eyes in a BGR frame, or NaN if none found.
+
+    ``roi`` is an optional fixed eye box ``(x, y, w, h)`` for setups where
+    the head is held still; otherwise eyes are found with a Haar cascade.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    boxes = [roi] if roi is not None else find_eyes(gray)
+    ratios = [pupil_ratio(gray[y : y + h, x : x + w]) for x, y, w, h in boxes]
+    ratios = [r for r in ratios if not np.isnan(r)]
+    return float(np.mean(ratios)) if ratios else np.nan
+
+
+def _video_frame_count(video_path):
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+
+
+def measure_frame_range(video_path, start, stop, roi=None, batch_size=64, stride=1):
+    """Pupil ratio of frames ``start, start + stride, ... < stop`` of a video.
+
+    Frames are decoded one at a time, so memory does not grow with the
+    range. Eye detection is the expensive step, so without a fixed ``roi``
+    the eyes are located once per ``batch_size`` frames and those boxes are
+    reused for the rest of the batch; a batch whose first frames show no
+    eyes keeps looking until it finds them. Returns ``(frame_indices,
+    ratios)``.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open {video_path}")
+    indices, ratios = [], []
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        boxes = [roi] if roi is not None else []
+        measured_frames = 0
+        for index in range(start, stop):
+            # grab() skips the decode of frames that are stepped over
+            if (index - start) % stride:
+                if not cap.grab():
+                    break
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if roi is None and (not boxes or measured_frames % batch_size == 0):
+                boxes = find_eyes(gray)
+            measured_frames += 1
+            measured = [pupil_ratio(gray[y : y + h, x : x + w]) for x, y, w, h in boxes]
+            measured = [r for r in measured if not np.isnan(r)]
+            indices.append(index)
+            ratios.append(float(np.mean(measured)) if measured else np.nan)
+    finally:
+        cap.release()
+    return np.asarray(indices, dtype=np.int64), np.asarray(ratios, dtype=float)
+
+
+def measure_video(
+    video_path, roi=None, workers=None, batch_size=64, stride=1, n_frames=None
+):
+    """Per-frame pupil ratios of a whole video, split across worker processes.
+
+    The video is cut into one contiguous frame range per worker; each worker
+    opens the file itself, seeks to its range and streams through it with
+    ``measure_frame_range``. ``n_frames`` defaults to the container's frame
+    count (pass the length of the ``_frames.csv`` sidecar when available).
+    Returns ``(frame_indices, ratios)`` in frame order.
+    """
+    if n_frames is None:
+        n_frames = _video_frame_count(video_path)
+    if n_frames <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    workers = max(1, min(workers or os.cpu_count() or 1, n_frames // batch_size or 1))
+
+    # Range boundaries fall on the stride so the sampled frames don't depend
+    # on the number of workers
+    per_worker = -(-n_frames // (workers * stride)) * stride
+    ranges = [
+        (start, min(start + per_worker, n_frames))
+        for start in range(0, n_frames, per_worker)
+    ]
+    args = [(str(video_path), lo, hi, roi, batch_size, stride) for lo, hi in ranges]
+    if len(ranges) == 1:
+        parts = [measure_frame_range(*args[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            parts = list(pool.map(measure_frame_range, *zip(*args)))
+    return (
+        np.concatenate([indices for indices, _ in parts]),
+        np.concatenate([ratios for _, ratios in parts]),
+    )
@@ -4,53 +4,118 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 
-def quadrant_analysis():
-    print("Loading data...")
-    try:
-        df = pd.read_excel('data.xlsx')
-    except FileNotFoundError:
-        print("Error: data.xlsx not found.")
-        return
-
-    # --- 1. Calculate Metrics ---
-    # Ease (Assuming High Likert = Good)
-    df['z_NASA'] = stats.zscore(df['NASA_Total'])
-    df['z_HR'] = stats.zscore(df['Delta_HR'])
-    df['z_Pupil'] = stats.zscore(df['Delta_Pupil_mean'])
-    df['z_Likert'] = stats.zscore(df['LIKERT_Total'])
-    df['Strain_Index'] = (df['z_NASA'] + df['z_HR'] + df['z_Pupil'] + df['z_Likert']) / 4
-    df['Learning_Ease'] = -1 * df['Strain_Index']
-    
+from study_data import load_study_table
+
+# Category codes are 2 * (low score) + (low ease)
+QUADRANTS = [
+    'Flow (Easy & Effective)',
+    'Brute Force (Hard but Effective)',
+    'Illusion (Easy but Failed)',
+    'Struggle (Hard & Failed)',
+]
+QUADRANT_DTYPE = pd.CategoricalDtype(QUADRANTS)
+
+# rule -> (lower cut quantile, upper cut quantile, default grouping column)
+SPLIT_RULES = {
+    'median': (0.5, 0.5, None),
+    'tertile': (1 / 3, 2 / 3, None),
+    'participant_median': (0.5, 0.5, 'ID'),
+}
+
+
+def split_levels(df, column, rule='median', by=None):
+    """High (1) / low (0) level of ``column`` per row, -1 if in neither.
+
+    Values at or above the upper cut are high and values below the lower
+    cut are low; for the tertile rule the middle third gets -1. Cuts are
+    quantiles of the whole column, or of each ``by`` group when given.
+    """
+    lo_q, hi_q, default_by = SPLIT_RULES[rule]
+    by = by or default_by
+    if by is None:
+        lo = df[column].quantile(lo_q)
+        hi = df[column].quantile(hi_q)
+    else:
+        groups = df.groupby(by)[column]
+        lo = groups.transform('quantile', lo_q).to_numpy()
+        hi = groups.transform('quantile', hi_q).to_numpy()
+    values = df[column].to_numpy()
+    return np.select([values >= hi, values < lo], [1, 0], -1), lo, hi
+
+
+def classify_quadrants(df, rule='median', by=None,
+                       score='Objective_Percent', ease='Learning_Ease'):
+    """Learning_Type of every row as a categorical Series, in one vectorized pass.
+
+    Rows that fall between the cuts of either axis (tertile rule) are NaN.
+    """
+    score_level, _, _ = split_levels(df, score, rule, by)
+    ease_level, _, _ = split_levels(df, ease, rule, by)
+    codes = 2 * (1 - score_level) + (1 - ease_level)
+    codes[(score_level < 0) | (ease_level < 0)] = -1
+    return pd.Series(
+        pd.Categorical.from_codes(codes, dtype=QUADRANT_DTYPE),
+        index=df.index, name='Learning_Type',
+    )
+
+
+def quadrant_table(df, types, row='Modality'):
+    """Contingency table of ``row`` x quadrant and its chi-square test.
+
+    Counts come from a single bincount over the combined category codes;
+    empty rows and columns are dropped before testing, as crosstab would.
+    Returns ``(table, (chi2, p, dof, expected))``.
+    """
+    rows = df[row].astype('category')
+    row_codes = rows.cat.codes.to_numpy()
+    type_codes = types.cat.codes.to_numpy()
+    valid = (row_codes >= 0) & (type_codes >= 0)
+    n_rows, n_types = len(rows.cat.categories), len(QUADRANTS)
+    counts = np.bincount(
+        row_codes[valid] * n_types + type_codes[valid], minlength=n_rows * n_types
+    ).reshape(n_rows, n_types)
+
+    table = pd.DataFrame(
+        counts,
+        index=pd.Index(rows.cat.categories, name=row),
+        columns=pd.Index(QUADRANTS, name='Learning_Type'),
+    )
+    table = table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+    return table, stats.chi2_contingency(table)
+
+
+def quadrant_analysis(df=None, rule='median', by=None):
+    if df is None:
+        print("Loading data...")
+        try:
+            df = load_study_table('data.xlsx')
+        except FileNotFoundError:
+            print("Error: data.xlsx not found.")
+            return
+
     # --- 2. Classification Logic ---
-    # Define Thresholds (Median Split)
-    score_median = df['Objective_Percent'].median()
-    ease_median = df['Learning_Ease'].median()
-    
-    print(f"Median Score: {score_median:.2f}")
-    print(f"Median Ease (Z): {ease_median:.2f}")
-
-    def categorize(row):
-        high_score = row['Objective_Percent'] >= score_median
-        high_ease = row['Learning_Ease'] >= ease_median
-        
-        if high_score and high_ease:
-            return 'Flow (Easy & Effective)'
-        elif high_score and not high_ease:
-            return 'Brute Force (Hard but Effective)'
-        elif not high_score and high_ease:
-            return 'Illusion (Easy but Failed)'
-        else:
-            return 'Struggle (Hard & Failed)'
-
-    df['Learning_Type'] = df.apply(categorize, axis=1)
+    # Define Thresholds (Median Split by default)
+    _, score_lo, score_median = split_levels(df, 'Objective_Percent', rule, by)
+    _, ease_lo, ease_median = split_levels(df, 'Learning_Ease', rule, by)
+    pooled = np.isscalar(score_median)
+
+    if rule == 'median' and pooled:
+        print(f"Median Score: {score_median:.2f}")
+        print(f"Median Ease (Z): {ease_median:.2f}")
+    elif pooled:
+        print(f"Score cuts ({rule}): {score_lo:.2f} / {score_median:.2f}")
+        print(f"Ease cuts (Z, {rule}): {ease_lo:.2f} / {ease_median:.2f}")
+    else:
+        print(f"Split rule: {rule} (thresholds per {by or SPLIT_RULES[rule][2]})")
+
+    df['Learning_Type'] = classify_quadrants(df, rule, by)
     
     # --- 3. Analysis Table (Frequency) ---
     print("\n--- Quadrant Distribution by Modality ---")
-    contingency_table = pd.crosstab(df['Modality'], df['Learning_Type'])
+    contingency_table, (chi2, p, dof, expected) = quadrant_table(df, df['Learning_Type'])
     print(contingency_table)
     
     # Chi-Square Test
-    chi2, p, dof, expected = stats.chi2_contingency(contingency_table)
     print(f"\nChi-Square Test of Independence: Chi2={chi2:.2f}, p={p:.4f}")
     if p < 0.05:
         print("RESULT: Significant dependency between Modality and Learning Type.")
@@ -82,15 +147,18 @@ def quadrant_analysis():
         alpha=0.9
     )
     
-    # Add Quadrant Lines
-    plt.axvline(x=ease_median, color='gray', linestyle='--')
-    plt.axhline(y=score_median, color='gray', linestyle='--')
+    # Add Quadrant Lines (only meaningful when the cuts are shared by all rows)
+    if pooled:
+        for cut in {ease_lo, ease_median}:
+            plt.axvline(x=cut, color='gray', linestyle='--')
+        for cut in {score_lo, score_median}:
+            plt.axhline(y=cut, color='gray', linestyle='--')
     
-    # Annotate Regions
-    plt.text(ease_median + 0.1, score_median + 2, "FLOW", color='green', fontweight='bold')
-    plt.text(ease_median - 0.1, score_median + 2, "BRUTE FORCE", color='orange', fontweight='bold', ha='right')
-    plt.text(ease_median + 0.1, score_median - 2, "ILLUSION", color='blue', fontweight='bold', va='top')
-    plt.text(ease_median - 0.1, score_median - 2, "STRUGGLE", color='red', fontweight='bold', ha='right', va='top')
+        # Annotate Regions
+        plt.text(ease_median + 0.1, score_median + 2, "FLOW", color='green', fontweight='bold')
+        plt.text(ease_median - 0.1, score_median + 2, "BRUTE FORCE", color='orange', fontweight='bold', ha='right')
+        plt.text(ease_median + 0.1, score_median - 2, "ILLUSION", color='blue', fontweight='bold', va='top')
+        plt.text(ease_median - 0.1, score_median - 2, "STRUGGLE", color='red', fontweight='bold', ha='right', va='top')
     
     plt.title('The 4 Quadrants of Learning State')
     plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
@@ -0,0 +1,293 @@
+from itertools import combinations
+
+import numpy as np
+from scipy import stats
+
+
+def _percentile_ci(samples, ci):
+    alpha = (1 - ci) / 2
+    lo, hi = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+    return lo, hi
+
+
+def _bca_ci(samples, observed, jackknife, ci):
+    """Bias-corrected and accelerated bootstrap interval for one statistic.
+
+    ``jackknife`` holds the leave-one-out values of the statistic; they give
+    the acceleration, and the share of bootstrap values below ``observed``
+    gives the bias correction.
+    """
+    samples = samples[~np.isnan(samples)]
+    below = np.mean(samples < observed) + 0.5 * np.mean(samples == observed)
+    z0 = stats.norm.ppf(np.clip(below, 1 / len(samples), 1 - 1 / len(samples)))
+    dev = jackknife.mean() - jackknife
+    denom = 6 * (dev ** 2).sum() ** 1.5
+    accel = (dev ** 3).sum() / denom if denom > 0 else 0.0
+    z = stats.norm.ppf([(1 - ci) / 2, (1 + ci) / 2])
+    levels = stats.norm.cdf(z0 + (z0 + z) / (1 - accel * (z0 + z)))
+    lo, hi = np.quantile(samples, levels)
+    return lo, hi
+
+
+# Size of one resample-by-row array in a chunk; a chunk holds a few such
+# arrays at once, so this bounds its working memory whatever the table size
+CHUNK_BYTES = 32 * 2**20
+
+
+def _chunk_resamples(row_bytes, chunk_size=None):
+    """Resamples per chunk so one ``row_bytes``-per-resample array fits
+    ``CHUNK_BYTES``, capped at ``chunk_size`` if given."""
+    size = max(1, CHUNK_BYTES // max(int(row_bytes), 1))
+    return min(size, chunk_size) if chunk_size else size
+
+
+def _chunks(n_resamples, chunk_size):
+    for start in range(0, n_resamples, chunk_size):
+        yield min(chunk_size, n_resamples - start)
+
+
+# Fewest rows per group (or subjects) the eta squared bootstrap is trusted
+# on; below this the resamples take too few distinct values to say anything
+MIN_BOOTSTRAP_GROUP = 10
+
+
+# --- Within-subject (repeated measures) ---
+
+def _rm_anova(Y):
+    """F and partial eta squared of a one-way RM-ANOVA, batched over leading axes.
+
+    ``Y`` has shape ``(..., n_subjects, k_conditions)``.
+    """
+    n, k = Y.shape[-2:]
+    grand = Y.mean(axis=(-2, -1), keepdims=True)
+    cond_means = Y.mean(axis=-2)
+    subj_means = Y.mean(axis=-1)
+    ss_cond = n * ((cond_means - cond_means.mean(axis=-1, keepdims=True)) ** 2).sum(axis=-1)
+    ss_subj = k * ((subj_means - subj_means.mean(axis=-1, keepdims=True)) ** 2).sum(axis=-1)
+    ss_total = ((Y - grand) ** 2).sum(axis=(-2, -1))
+    ss_err = ss_total - ss_cond - ss_subj
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = (ss_cond / (k - 1)) / (ss_err / ((n - 1) * (k - 1)))
+        eta = ss_cond / (ss_cond + ss_err)
+    return f, eta
+
+
+def _jackknife_partial_eta_sq(Y):
+    """Partial eta squared with each subject left out in turn, from running sums."""
+    n, k = Y.shape
+    m = n - 1
+    cols, rows = Y.sum(axis=0), Y.sum(axis=1)
+    total, total_sq = Y.sum(), (Y ** 2).sum()
+    t = total - rows
+    correction = t ** 2 / (m * k)
+    ss_cond = ((cols - Y) ** 2).sum(axis=1) / m - correction
+    ss_subj = ((rows ** 2).sum() - rows ** 2) / k - correction
+    ss_total = total_sq - (Y ** 2).sum(axis=1) - correction
+    ss_err = ss_total - ss_cond - ss_subj
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ss_cond / (ss_cond + ss_err)
+
+
+def _pairwise(Y, pairs):
+    """Mean difference and Cohen's d_z for each condition pair, batched."""
+    diffs = np.stack([Y[..., :, i] - Y[..., :, j] for i, j in pairs], axis=-1)
+    mean = diffs.mean(axis=-2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dz = mean / diffs.std(axis=-2, ddof=1)
+    return mean, dz
+
+
+def within_subject_test(df, value, subject='ID', condition='Modality',
+                        n_resamples=10000, seed=None, chunk_size=None, ci=0.95):
+    """Permutation RM-ANOVA with bootstrap confidence intervals.
+
+    The p-value comes from shuffling condition labels within each subject;
+    since each subject's values are fixed under that shuffle, the condition
+    sum of squares orders the permutations exactly as F does. Confidence
+    intervals for partial eta squared, condition means and pairwise
+    differences (with Cohen's d_z) come from resampling subjects; the
+    partial eta squared interval is BCa, and None with fewer than
+    ``MIN_BOOTSTRAP_GROUP`` subjects, where resampling subjects inflates it
+    past what BCa can correct. Each chunk of resamples is evaluated as one
+    array operation; chunks are sized from ``CHUNK_BYTES`` (and at most
+    ``chunk_size``), so memory stays bounded however large the table is.
+    """
+    wide = df.pivot_table(index=subject, columns=condition, values=value, aggfunc='mean')
+    wide = wide.dropna()
+    conditions = list(wide.columns)
+    Y = wide.to_numpy(dtype=float)
+    n, k = Y.shape
+    pairs = list(combinations(range(k), 2))
+    rng = np.random.default_rng(seed)
+
+    chunk_size = _chunk_resamples(8 * n * max(k, len(pairs)), chunk_size)
+
+    f_obs, eta_obs = _rm_anova(Y)
+    ss_obs = n * Y.mean(axis=0).var() * k
+    diff_obs, dz_obs = _pairwise(Y, pairs)
+
+    exceed = 0
+    for b in _chunks(n_resamples, chunk_size):
+        order = rng.random((b, n, k)).argsort(axis=-1)
+        shuffled = np.take_along_axis(np.broadcast_to(Y, (b, n, k)), order, axis=-1)
+        ss = n * shuffled.mean(axis=-2).var(axis=-1) * k
+        exceed += int((ss >= ss_obs * (1 - 1e-12)).sum())
+    p_value = (exceed + 1) / (n_resamples + 1)
+
+    boot = {'eta': [], 'means': [], 'diff': [], 'dz': []}
+    for b in _chunks(n_resamples, chunk_size):
+        sample = Y[rng.integers(0, n, (b, n))]
+        boot['eta'].append(_rm_anova(sample)[1])
+        boot['means'].append(sample.mean(axis=-2))
+        diff, dz = _pairwise(sample, pairs)
+        boot['diff'].append(diff)
+        boot['dz'].append(dz)
+    boot = {key: np.concatenate(parts) for key, parts in boot.items()}
+
+    means_lo, means_hi = _percentile_ci(boot['means'], ci)
+    diff_lo, diff_hi = _percentile_ci(boot['diff'], ci)
+    dz_lo, dz_hi = _percentile_ci(boot['dz'], ci)
+    eta_ci = None
+    if n >= MIN_BOOTSTRAP_GROUP:
+        eta_lo, eta_hi = _bca_ci(boot['eta'], eta_obs, _jackknife_partial_eta_sq(Y), ci)
+        eta_ci = (float(eta_lo), float(eta_hi))
+    return {
+        'variable': value,
+        'n_subjects': n,
+        'conditions': conditions,
+        'F': float(f_obs),
+        'p_value': p_value,
+        'n_resamples': n_resamples,
+        'eta_sq_partial': float(eta_obs),
+        'eta_sq_partial_ci': eta_ci,
+        'means': {
+            c: (float(Y[:, i].mean()), float(means_lo[i]), float(means_hi[i]))
+            for i, c in enumerate(conditions)
+        },
+        'pairwise': [
+            {
+                'pair': (conditions[i], conditions[j]),
+                'diff': float(diff_obs[p]),
+                'diff_ci': (float(diff_lo[p]), float(diff_hi[p])),
+                'dz': float(dz_obs[p]),
+                'dz_ci': (float(dz_lo[p]), float(dz_hi[p])),
+            }
+            for p, (i, j) in enumerate(pairs)
+        ],
+    }
+
+
+# --- Independent groups ---
+
+def _jackknife_eta_sq(values, codes, counts):
+    """Eta squared with each row left out in turn, from running sums."""
+    n_total = len(values)
+    sums = np.bincount(codes, weights=values, minlength=len(counts))
+    total, total_sq = values.sum(), (values ** 2).sum()
+    s_g, n_g = sums[codes] - values, counts[codes] - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        own = np.where(n_g > 0, s_g ** 2 / n_g, 0.0)
+        correction = (total - values) ** 2 / (n_total - 1)
+        ssb = (sums ** 2 / counts).sum() - sums[codes] ** 2 / counts[codes] + own - correction
+        sst = total_sq - values ** 2 - correction
+        return ssb / sst
+
+
+def between_groups_test(df, value, group, n_resamples=10000, seed=None,
+                        chunk_size=None, ci=0.95):
+    """Permutation one-way ANOVA with a bootstrap CI for eta squared.
+
+    Group labels are shuffled across all rows; the total sum of squares is
+    unchanged by that, so the between-group sum of squares orders the
+    permutations as F does. Group sums for a whole chunk of permutations
+    are one matrix product with the one-hot group design. The bootstrap
+    resamples within each group so group sizes stay fixed, and the interval
+    is BCa because that resampling shrinks the within-group spread and
+    inflates eta squared. With fewer than ``MIN_BOOTSTRAP_GROUP`` rows in
+    some group even BCa can't correct it, and ``eta_sq_ci`` is None.
+    Chunks are sized from ``CHUNK_BYTES`` as in ``within_subject_test``.
+    """
+    data = df[[group, value]].dropna().sort_values(group, kind='stable')
+    codes, groups = data[group].factorize()
+    values = data[value].to_numpy(dtype=float)
+    n_total, n_groups = len(values), len(groups)
+    onehot = np.eye(n_groups)[codes]
+    counts = onehot.sum(axis=0)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+    rng = np.random.default_rng(seed)
+    chunk_size = _chunk_resamples(8 * n_total, chunk_size)
+
+    def ss_between(V):
+        means = (V @ onehot) / counts
+        grand = V.mean(axis=-1, keepdims=True)
+        return (counts * (means - grand) ** 2).sum(axis=-1)
+
+    ss_total = ((values - values.mean()) ** 2).sum()
+    ssb_obs = ss_between(values)
+    f_obs = (ssb_obs / (n_groups - 1)) / ((ss_total - ssb_obs) / (n_total - n_groups))
+    eta_obs = ssb_obs / ss_total
+
+    exceed = 0
+    for b in _chunks(n_resamples, chunk_size):
+        shuffled = values[rng.random((b, n_total)).argsort(axis=-1)]
+        exceed += int((ss_between(shuffled) >= ssb_obs * (1 - 1e-12)).sum())
+    p_value = (exceed + 1) / (n_resamples + 1)
+
+    eta_ci = None
+    if counts.min() >= MIN_BOOTSTRAP_GROUP:
+        etas = []
+        for b in _chunks(n_resamples, chunk_size):
+            idx = np.concatenate(
+                [
+                    start + rng.integers(0, int(count), (b, int(count)))
+                    for start, count in zip(starts, counts)
+                ],
+                axis=1,
+            )
+            sample = values[idx]
+            total = ((sample - sample.mean(axis=-1, keepdims=True)) ** 2).sum(axis=-1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                etas.append(ss_between(sample) / total)
+        eta_lo, eta_hi = _bca_ci(
+            np.concatenate(etas), eta_obs, _jackknife_eta_sq(values, codes, counts), ci
+        )
+        eta_ci = (float(eta_lo), float(eta_hi))
+
+    return {
+        'variable': value,
+        'groups': list(groups),
+        'F': float(f_obs),
+        'p_value': p_value,
+        'n_resamples': n_resamples,
+        'eta_sq': float(eta_obs),
+        'eta_sq_ci': eta_ci,
+    }
+
+
+def format_within_subject(result):
+    """Human-readable report of a ``within_subject_test`` result."""
+    eta_ci = result['eta_sq_partial_ci']
+    # No interval when there are too few subjects to bootstrap it
+    eta_ci = '' if eta_ci is None else ' [95% BCa {:.3f}, {:.3f}]'.format(*eta_ci)
+    lines = [
+        f"Permutation RM-ANOVA ({result['n_resamples']} resamples, "
+        f"n={result['n_subjects']}): F={result['F']:.3f}, p={result['p_value']:.4f}",
+        f"Partial eta^2 = {result['eta_sq_partial']:.3f}{eta_ci}",
+        "Condition means [95% bootstrap CI]:",
+    ]
+    for cond, (mean, m_lo, m_hi) in result['means'].items():
+        lines.append(f"  {cond}: {mean:.3f} [{m_lo:.3f}, {m_hi:.3f}]")
+    lines.append("Pairwise differences:")
+    for pair in result['pairwise']:
+        a, b = pair['pair']
+        d_lo, d_hi = pair['diff_ci']
+        z_lo, z_hi = pair['dz_ci']
+        lines.append(
+            f"  {a} - {b}: {pair['diff']:.3f} [{d_lo:.3f}, {d_hi:.3f}], "
+            f"d_z={pair['dz']:.2f} [{z_lo:.2f}, {z_hi:.2f}]"
+        )
+    if result['p_value'] < 0.05:
+        lines.append("RESULT: SIGNIFICANT difference found.")
+    else:
+        lines.append("RESULT: No significant difference found.")
+    return "\n".join(lines)
@@ -0,0 +1,121 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+from analysis import run_analysis_v4  # noqa: E402
+from combo_analysis import combo_analysis  # noqa: E402
+from mixed_effects import mixed_effects_analysis  # noqa: E402
+from plot_individual_analysis import plot_individual_analysis  # noqa: E402
+from quadrant_analysis import quadrant_analysis  # noqa: E402
+from study_data import load_study_table  # noqa: E402
+from topic_analysis import topic_interaction_analysis  # noqa: E402
+
+STAGES = {
+    'anova': run_analysis_v4,
+    'quadrants': quadrant_analysis,
+    'topic': topic_interaction_analysis,
+    'combo': combo_analysis,
+    'individual': plot_individual_analysis,
+    'mixed': mixed_effects_analysis,
+}
+
+
+def run_stage(name, df):
+    """Run one report on its own copy of the table, capturing its output.
+
+    Returns ``(output, seconds, ok)``. A report that raises doesn't stop
+    the others: its traceback is appended to whatever it printed.
+    """
+    out = io.StringIO()
+    start = time.perf_counter()
+    ok = True
+    with contextlib.redirect_stdout(out):
+        try:
+            STAGES[name](df.copy())
+        except Exception:
+            ok = False
+            print(traceback.format_exc(), end='')
+    plt.close('all')
+    return out.getvalue(), time.perf_counter() - start, ok
+
+
+def _collect(future):
+    # A worker that dies outright (not a report error) still fails one stage
+    try:
+        return future.result()
+    except Exception:
+        return traceback.format_exc(), 0.0, False
+
+
+def run_reports(stages=None, data='data.xlsx', jobs=None):
+    """Load the study table once and run the selected report stages.
+
+    With more than one job, stages run in worker processes forked from
+    this one, so they reuse its already imported libraries instead of
+    starting a fresh interpreter each. Each stage's output is printed in
+    stage order once it finishes, followed by the per-stage timings; a
+    stage that fails shows its traceback and is marked FAILED.
+    """
+    stages = list(stages or STAGES)
+    timings = {}
+
+    start = time.perf_counter()
+    print("Loading data...")
+    try:
+        df = load_study_table(data)
+    except FileNotFoundError:
+        print(f"Error: {data} not found.")
+        return None
+    timings['load'] = time.perf_counter() - start
+
+    jobs = min(jobs or os.cpu_count() or 1, len(stages))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {name: pool.submit(run_stage, name, df) for name in stages}
+            results = {name: _collect(future) for name, future in futures.items()}
+    else:
+        results = {name: run_stage(name, df) for name in stages}
+
+    failed = []
+    for name in stages:
+        output, elapsed, ok = results[name]
+        timings[name] = elapsed
+        if not ok:
+            failed.append(name)
+        print(f"\n##### {name}{'' if ok else ' (FAILED)'} #####")
+        print(output, end='')
+
+    timings['total'] = time.perf_counter() - start
+    print("\n--- Stage timings ---")
+    for name, elapsed in timings.items():
+        print(f"{name:<12} {elapsed:8.2f} s{'  FAILED' if name in failed else ''}")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the analysis reports in one process."
+    )
+    parser.add_argument(
+        'stages', nargs='*', metavar='stage',
+        help=f"Stages to run (default: all of {', '.join(STAGES)})",
+    )
+    parser.add_argument('--data', default='data.xlsx')
+    parser.add_argument(
+        '--jobs', type=int, default=None,
+        help="Worker processes (default: one per stage, up to the CPU count)",
+    )
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    run_reports(args.stages, args.data, args.jobs)
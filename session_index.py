@@ -0,0 +1,243 @@
+import hashlib
+import os
+import tarfile
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from ecg_format import BINARY_SUFFIX, ECGRecording, find_ecg_logs
+from frame_pipeline import MANIFEST_SUFFIX, read_manifest
+
+INDEX_FILE = "session_index.npz"
+INDEX_VERSION = 2  # 2: one ECG stream per sensor
+STILL_STREAMS = ("screenshots", "webcam_frames")
+INDEXED_DIRS = ("ecg_logs", "video_recordings") + STILL_STREAMS
+STILL_SUFFIXES = (".png", ".jpg", ".webp")
+
+
+def _fingerprint(session_dir):
+    h = hashlib.sha1(f"v{INDEX_VERSION}\n".encode())
+    for sub in INDEXED_DIRS:
+        path = Path(session_dir) / sub
+        if not path.is_dir():
+            continue
+        # ECG logs of several sensors sit one folder down, ecg_logs/<serial>
+        folders = [path] + sorted(p for p in path.iterdir() if p.is_dir())
+        for folder in folders:
+            prefix = folder.relative_to(session_dir).as_posix()
+            for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+                if entry.is_dir():
+                    continue
+                st = entry.stat()
+                h.update(f"{prefix}/{entry.name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _ecg_timestamps(path):
+    if path.suffix == BINARY_SUFFIX:
+        return np.array(ECGRecording(path).timestamps)
+    return pd.read_csv(path, usecols=["timestamp"])["timestamp"].to_numpy()
+
+
+def _video_timestamps(path):
+    """Capture time of every frame in a recorded video.
+
+    Uses the ``<video>_frames.csv`` written alongside each recording; older
+    recordings without one are spread evenly from the start time in the
+    file name at the container's nominal frame rate.
+    """
+    sidecar = path.with_name(f"{path.stem}_frames.csv")
+    if sidecar.exists():
+        return pd.read_csv(sidecar, usecols=["timestamp"])["timestamp"].to_numpy()
+    cap = cv2.VideoCapture(str(path))
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+    start = datetime.strptime("_".join(path.stem.split("_")[1:3]), "%Y%m%d_%H%M%S")
+    return start.timestamp() + np.arange(n_frames) / fps
+
+
+def _video_files(directory):
+    """Videos to index, in recording order.
+
+    Recordings with a segment manifest contribute the segments it lists; a
+    segment missing from it was still open when the recorder died and is
+    skipped. Videos without a manifest (older recordings) are all used.
+    ``{path: frame count}`` is returned for the manifest-listed segments.
+    """
+    directory = Path(directory)
+    listed, owners = {}, []
+    for manifest in sorted(directory.glob(f"*{MANIFEST_SUFFIX}")):
+        owners.append(manifest.name[: -len(MANIFEST_SUFFIX)])
+        for entry in read_manifest(manifest):
+            listed[directory / entry["file"]] = entry["frames"]
+    videos = [
+        path
+        for path in sorted(directory.glob("*.avi"))
+        if path in listed or not any(path.stem.startswith(o) for o in owners)
+    ]
+    return videos, listed
+
+
+def _still_entries(directory):
+    """``(timestamp, path)`` for loose stills and members of tar chunks.
+
+    Archived stills are addressed as ``<archive>.tar:<member>``.
+    """
+    entries = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix in STILL_SUFFIXES:
+            entries.append((float(path.stem.split("_", 1)[1]), str(path)))
+        elif path.suffix == ".tar":
+            with tarfile.open(path) as tar:
+                for name in tar.getnames():
+                    timestamp = float(Path(name).stem.split("_", 1)[1])
+                    entries.append((timestamp, f"{path}:{name}"))
+    entries.sort()
+    return entries
+
+
+def _concat(files, loader):
+    """Concatenate per-file timestamp arrays and record where each file starts."""
+    arrays = [loader(f) for f in files]
+    starts = np.cumsum([0] + [len(a) for a in arrays])
+    times = np.concatenate(arrays) if arrays else np.empty(0)
+    return times, starts
+
+
+class SessionIndex:
+    """Time index over the ECG, video and still-image streams of a session.
+
+    Each stream's timestamps are kept as one sorted array, so finding what
+    was recorded in a time window is a binary search per stream. The index
+    is saved as ``session_index.npz`` in the session folder; ``load``
+    rebuilds it when missing or when the recorded files have changed.
+
+    Each ECG sensor is its own stream, keyed by serial (``""`` for the logs
+    of a single-sensor session). ``ecg_logs``, ``ecg_times`` and
+    ``ecg_starts`` describe the first one.
+    """
+
+    def __init__(self, session_dir, arrays):
+        self.session_dir = Path(session_dir)
+        self.fingerprint = str(arrays["fingerprint"])
+        self.ecg_sensors = [str(s) for s in arrays["ecg_sensors"]]
+        self.ecg_streams = {
+            sensor: (
+                [str(p) for p in arrays[f"ecg{i}_logs"]],
+                arrays[f"ecg{i}_times"],
+                arrays[f"ecg{i}_starts"],
+            )
+            for i, sensor in enumerate(self.ecg_sensors)
+        }
+        self.ecg_logs, self.ecg_times, self.ecg_starts = self.ecg_streams.get(
+            self.ecg_sensors[0] if self.ecg_sensors else None,
+            ([], np.empty(0), np.zeros(1, dtype=int)),
+        )
+        self.videos = [str(p) for p in arrays["videos"]]
+        self.video_times = arrays["video_times"]
+        self.video_starts = arrays["video_starts"]
+        self.still_times = {s: arrays[f"{s}_times"] for s in STILL_STREAMS}
+        self.still_paths = {s: arrays[f"{s}_paths"] for s in STILL_STREAMS}
+
+    @classmethod
+    def build(cls, session_dir):
+        """Scan the session folder, then save and return a fresh index."""
+        session_dir = Path(session_dir)
+        ecg_streams = find_ecg_logs(session_dir / "ecg_logs")
+        videos, frame_counts = _video_files(session_dir / "video_recordings")
+        video_times, video_starts = _concat(
+            videos, lambda p: _video_timestamps(p)[: frame_counts.get(p)]
+        )
+
+        arrays = {
+            "fingerprint": np.array(_fingerprint(session_dir)),
+            "ecg_sensors": np.array(list(ecg_streams), dtype=str),
+            "videos": np.array([str(p) for p in videos], dtype=str),
+            "video_times": video_times,
+            "video_starts": video_starts,
+        }
+        for i, logs in enumerate(ecg_streams.values()):
+            times, starts = _concat(logs, _ecg_timestamps)
+            arrays[f"ecg{i}_logs"] = np.array([str(p) for p in logs], dtype=str)
+            arrays[f"ecg{i}_times"] = times
+            arrays[f"ecg{i}_starts"] = starts
+        for stream in STILL_STREAMS:
+            directory = session_dir / stream
+            entries = _still_entries(directory) if directory.is_dir() else []
+            times = [t for t, _ in entries]
+            paths = [p for _, p in entries]
+            arrays[f"{stream}_times"] = np.array(times, dtype=float)
+            arrays[f"{stream}_paths"] = np.array(paths, dtype=str)
+
+        np.savez(session_dir / INDEX_FILE, **arrays)
+        return cls(session_dir, arrays)
+
+    @classmethod
+    def load(cls, session_dir):
+        """Load the saved index, rebuilding it if it is missing or stale."""
+        path = Path(session_dir) / INDEX_FILE
+        if path.exists():
+            with np.load(path) as saved:
+                arrays = dict(saved)
+            if str(arrays["fingerprint"]) == _fingerprint(session_dir):
+                return cls(session_dir, arrays)
+        return cls.build(session_dir)
+
+    @staticmethod
+    def _file_ranges(files, times, starts, start, end):
+        lo = np.searchsorted(times, start, side="left")
+        hi = np.searchsorted(times, end, side="left")
+        if lo >= hi:
+            return []
+        first = np.searchsorted(starts, lo, side="right") - 1
+        last = np.searchsorted(starts, hi - 1, side="right") - 1
+        ranges = []
+        for i in range(first, last + 1):
+            file_lo = max(lo, starts[i]) - starts[i]
+            file_hi = min(hi, starts[i + 1]) - starts[i]
+            ranges.append((files[i], int(file_lo), int(file_hi)))
+        return ranges
+
+    def ecg_range(self, start, end, sensor=None):
+        """``[(log_path, first_sample, stop_sample)]`` for ``start <= t < end``.
+
+        ``sensor`` picks one stream of a multi-sensor session (default: the
+        first).
+        """
+        if sensor is None:
+            logs, times, starts = self.ecg_logs, self.ecg_times, self.ecg_starts
+        else:
+            logs, times, starts = self.ecg_streams[sensor]
+        return self._file_ranges(logs, times, starts, start, end)
+
+    def video_frames(self, start, end):
+        """``[(video_path, first_frame, stop_frame)]`` for ``start <= t < end``."""
+        return self._file_ranges(
+            self.videos, self.video_times, self.video_starts, start, end
+        )
+
+    def stills(self, stream, start, end):
+        """Paths of the ``stream`` stills captured in ``[start, end)``."""
+        times = self.still_times[stream]
+        lo = np.searchsorted(times, start, side="left")
+        hi = np.searchsorted(times, end, side="left")
+        return self.still_paths[stream][lo:hi].tolist()
+
+    def window(self, start, end):
+        """Everything recorded between two host timestamps.
+
+        ``"ecg"`` is the first sensor's stream; ``"ecg_sensors"`` has every
+        sensor's, keyed by serial.
+        """
+        return {
+            "ecg": self.ecg_range(start, end),
+            "ecg_sensors": {
+                sensor: self.ecg_range(start, end, sensor) for sensor in self.ecg_sensors
+            },
+            "video": self.video_frames(start, end),
+            **{stream: self.stills(stream, start, end) for stream in STILL_STREAMS},
+        }
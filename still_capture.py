@@ -0,0 +1,181 @@
+import io
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+IMAGE_FORMATS = ("png", "jpeg", "webp")
+
+
+def encode_image(
+    image, image_format="png", png_compression=1, quality=90, scale=1.0
+):
+    """Encode a BGR image, optionally downscaled, and return the bytes."""
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(
+            f"image_format must be one of {IMAGE_FORMATS}, got {image_format!r}"
+        )
+    if scale != 1.0:
+        image = cv2.resize(
+            image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+
+    if image_format == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+    elif image_format == "jpeg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    extension = "jpg" if image_format == "jpeg" else image_format
+    ok, buf = cv2.imencode(f".{extension}", image, params)
+    if not ok:
+        raise RuntimeError(f"Could not encode image as {image_format}")
+    return buf.tobytes()
+
+
+def screenshot_to_bgr(screenshot):
+    """Convert a PIL screenshot (as returned by pyautogui) to a BGR array."""
+    return cv2.cvtColor(np.asarray(screenshot.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+
+class _ChunkedArchive:
+    """Append encoded images to a series of uncompressed tar files.
+
+    A new chunk is started every ``chunk_images`` images so that a crash only
+    affects the chunk being written.
+    """
+
+    def __init__(self, directory, prefix, chunk_images):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.chunk_images = chunk_images
+        self._chunk = 0
+        self._count = 0
+        self._tar = None
+        self._lock = threading.Lock()
+
+    def add(self, member_name, data, mtime):
+        with self._lock:
+            if self._tar is None or self._count >= self.chunk_images:
+                self._roll()
+            info = tarfile.TarInfo(member_name)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            self._tar.addfile(info, io.BytesIO(data))
+            self._count += 1
+
+    def _roll(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._chunk += 1
+        path = self.directory / f"{self.prefix}_{self._chunk:04d}.tar"
+        self._tar = tarfile.open(path, "w")
+        self._count = 0
+
+    def close(self):
+        with self._lock:
+            if self._tar is not None:
+                self._tar.close()
+                self._tar = None
+
+
+class StillSaver:
+    """Encode and save still images on a pool of worker threads.
+
+    Images are submitted per stream (``"screenshots"``, ``"webcam_frames"``)
+    and written either as one file per image under ``session_dir/<stream>/``
+    or, with ``archive=True``, packed into ``<stream>_NNNN.tar`` chunks of
+    ``chunk_images`` images in the same folder. At most ``max_pending``
+    images wait for encoding at a time; anything beyond that is dropped and
+    counted.
+    """
+
+    def __init__(
+        self,
+        session_dir,
+        image_format="png",
+        png_compression=1,
+        quality=90,
+        scale=1.0,
+        archive=False,
+        chunk_images=1000,
+        workers=2,
+        max_pending=16,
+    ):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"image_format must be one of {IMAGE_FORMATS}, got {image_format!r}"
+            )
+        self.session_dir = Path(session_dir)
+        self.image_format = image_format
+        self.extension = "jpg" if image_format == "jpeg" else image_format
+        self.encode_options = {
+            "image_format": image_format,
+            "png_compression": png_compression,
+            "quality": quality,
+            "scale": scale,
+        }
+        self.archive = archive
+        self.chunk_images = chunk_images
+        self.stats = {"saved": 0, "dropped": 0, "bytes": 0, "encode_s": 0.0}
+
+        self._archives = {}
+        self._stats_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="still-saver"
+        )
+
+    def submit(self, stream, timestamp, image):
+        """Queue a BGR image for encoding; returns False if it was dropped."""
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.stats["dropped"] += 1
+            return False
+        future = self._executor.submit(self._save, stream, timestamp, image)
+        future.add_done_callback(self._done)
+        return True
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception() is not None:
+            print(f"Failed to save still image: {future.exception()}")
+
+    def _save(self, stream, timestamp, image):
+        start = time.perf_counter()
+        data = encode_image(image, **self.encode_options)
+        encode_s = time.perf_counter() - start
+        prefix = "screenshot" if stream == "screenshots" else "webcam"
+        name = f"{prefix}_{timestamp}.{self.extension}"
+
+        if self.archive:
+            self._archive_for(stream).add(name, data, timestamp)
+        else:
+            with open(self.session_dir / stream / name, "wb") as f:
+                f.write(data)
+
+        with self._stats_lock:
+            self.stats["saved"] += 1
+            self.stats["bytes"] += len(data)
+            self.stats["encode_s"] += encode_s
+
+    def _archive_for(self, stream):
+        with self._stats_lock:
+            if stream not in self._archives:
+                directory = self.session_dir / stream
+                directory.mkdir(parents=True, exist_ok=True)
+                self._archives[stream] = _ChunkedArchive(
+                    directory, stream, self.chunk_images
+                )
+            return self._archives[stream]
+
+    def close(self):
+        """Wait for queued images to be written and close any archives."""
+        self._executor.shutdown(wait=True)
+        for archive in self._archives.values():
+            archive.close()
+        return dict(self.stats)
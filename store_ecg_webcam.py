@@ -1,5 +1,7 @@
+import argparse
 import asyncio
 import csv
+import importlib
 import logging
 import os
 import threading
@@ -7,140 +9,433 @@ import time
 from datetime import datetime
 from pathlib import Path
 
-import cv2
-import pyautogui
-from bleak import BleakClient, BleakScanner
+try:
+    import config
+except ImportError:
+    # Only recording needs the local config.py; the benchmarks and other
+    # offline users of this module pass every setting explicitly, and the
+    # optional ones fall back to their getattr defaults
+    config = None
 
-import config
+from ecg_format import BINARY_SUFFIX, ECGRecordWriter
+from ecg_packets import PacketClock, decode_packet
+from live_ecg import HeartRateMonitor
+from telemetry import Telemetry
+
+_MODULE_LOADED = time.perf_counter()
 
 # Constants for ECG
 SAMPLING_RATE = 128
 NOTIFY_CHARACTERISTIC_UUID = "34800002-7185-4d5d-b431-630e7050e8f0"
 WRITE_CHARACTERISTIC_UUID = "34800001-7185-4d5d-b431-630e7050e8f0"
+PREFLIGHT_TIMEOUT = 10.0
 
+# The capture backends (cv2, pyautogui, bleak) are imported only when their
+# stream is started, so this module also imports on a headless machine.
+IMPORT_TIMES = {}  # module -> seconds spent importing it
+STARTUP_TIMES = {}  # stage -> seconds since this module was loaded
 
-class RawECGLogger:
-    def __init__(self, name):
-        self.log_dir = Path(f"data/{name}/ecg_logs")
-        os.makedirs(self.log_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = self.log_dir / f"ecg_raw_log_{timestamp}.csv"
 
-        # Write CSV headers
-        with open(self.log_file, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["timestamp", "raw_value", "scaled_value"])
+def _import_backend(module):
+    """Import ``module`` on first use, recording how long that took."""
+    start = time.perf_counter()
+    imported = importlib.import_module(module)
+    IMPORT_TIMES.setdefault(module, time.perf_counter() - start)
+    return imported
 
-    def log_sample(self, raw_value, scaled_value):
-        current_ts = datetime.now().timestamp()
-        with open(self.log_file, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([current_ts, raw_value, scaled_value])
 
+def _mark_startup(stage):
+    STARTUP_TIMES.setdefault(stage, time.perf_counter() - _MODULE_LOADED)
 
-class DataView:
-    def __init__(self, array):
-        self.array = array
 
-    def get_uint8(self, index):
-        return self.array[index]
+def startup_report():
+    """Backend import times and time-to-ready of each stream, as text."""
+    lines = [f"[{datetime.now()}] Startup report:"]
+    for module, seconds in IMPORT_TIMES.items():
+        lines.append(f"  import {module:<16} {seconds * 1000:8.1f} ms")
+    for stage, seconds in STARTUP_TIMES.items():
+        lines.append(f"  {stage:<23} {seconds:8.2f} s")
+    return "\n".join(lines)
 
-    def get_uint32(self, index):
-        return int.from_bytes(self.array[index : index + 4], byteorder="little")
 
-    def get_int32(self, index):
-        return int.from_bytes(
-            self.array[index : index + 4], byteorder="little", signed=True
+class RawECGLogger:
+    """Buffered CSV logger for raw ECG samples.
+
+    Samples are appended to an in-memory buffer and written out by a
+    background thread, either once ``flush_size`` rows are pending or every
+    ``flush_interval`` seconds. ``fsync`` controls durability: ``"never"``
+    leaves it to the OS, ``"close"`` syncs once when the log is closed and
+    ``"flush"`` syncs after every batch. If ``stop_event`` is given, the log
+    is flushed and closed as soon as it fires.
+
+    Packets carry the sensor's own timestamp; ``log_packet`` maps it onto the
+    host clock with one clock reading per packet and spaces the samples at
+    ``1 / sampling_rate``.
+
+    ``log_format`` selects the on-disk format: ``"csv"`` text, or ``"binary"``
+    fixed-width records readable with ``ecg_format.ECGRecording``. Logs go
+    to ``data/<name>/ecg_logs`` unless another ``log_dir`` is given.
+    """
+
+    FSYNC_POLICIES = ("never", "close", "flush")
+    LOG_FORMATS = ("csv", "binary")
+
+    def __init__(
+        self,
+        name,
+        stop_event=None,
+        flush_interval=1.0,
+        flush_size=SAMPLING_RATE,
+        fsync="close",
+        log_format="csv",
+        serial="",
+        sampling_rate=SAMPLING_RATE,
+        log_dir=None,
+    ):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(
+                f"fsync must be one of {self.FSYNC_POLICIES}, got {fsync!r}"
+            )
+        if log_format not in self.LOG_FORMATS:
+            raise ValueError(
+                f"log_format must be one of {self.LOG_FORMATS}, got {log_format!r}"
+            )
+        self.log_dir = Path(log_dir or f"data/{name}/ecg_logs")
+        os.makedirs(self.log_dir, exist_ok=True)
+        start_time = datetime.now()
+        timestamp = start_time.strftime("%Y%m%d_%H%M%S")
+        suffix = BINARY_SUFFIX if log_format == "binary" else ".csv"
+        self.log_file = self.log_dir / f"ecg_raw_log_{timestamp}{suffix}"
+        self.stop_event = stop_event
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.fsync = fsync
+
+        self.sampling_rate = sampling_rate
+        self.clock = PacketClock(sampling_rate)
+        self.stats = {"rows_written": 0, "flushes": 0, "max_backlog": 0}
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+
+        # Keep one handle open for the whole session and write the header
+        if log_format == "binary":
+            self._file = open(self.log_file, "wb")
+            self._writer = ECGRecordWriter(
+                self._file, sampling_rate, start_time.timestamp(), serial
+            )
+        else:
+            self._file = open(self.log_file, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["timestamp", "raw_value", "scaled_value"])
+        self._file.flush()
+
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="ecg-writer", daemon=True
         )
+        self._thread.start()
 
-
-def webcam_capture(stop_event, name):
-    """Run webcam capture in a separate thread."""
-    cap = cv2.VideoCapture(config.WEBCAM_INDEX)
+    def log_sample(self, raw_value, scaled_value):
+        current_ts = datetime.now().timestamp()
+        self._append([(current_ts, raw_value, scaled_value)])
+
+    def log_packet(self, raw_values, scaled_values, device_timestamp=None):
+        """Queue a whole packet of decoded samples.
+
+        Without a ``device_timestamp`` every sample gets the host time of
+        arrival, as ``log_sample`` does. Returns the sample timestamps.
+        """
+        host_ts = time.time()
+        if device_timestamp is None:
+            timestamps = [host_ts] * len(raw_values)
+        else:
+            timestamps = self.clock.sample_times(
+                device_timestamp, host_ts, len(raw_values)
+            ).tolist()
+        self._append(
+            list(zip(timestamps, raw_values.tolist(), scaled_values.tolist()))
+        )
+        return timestamps
+
+    def _append(self, rows):
+        if self._closed.is_set():
+            return
+        with self._buffer_lock:
+            self._buffer.extend(rows)
+            pending = len(self._buffer)
+            if pending > self.stats["max_backlog"]:
+                self.stats["max_backlog"] = pending
+        if pending >= self.flush_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all buffered rows to disk."""
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+        with self._io_lock:
+            if self._file.closed:
+                return
+            if rows:
+                self._writer.writerows(rows)
+                self._file.flush()
+                if self.fsync == "flush":
+                    os.fsync(self._file.fileno())
+                self.stats["rows_written"] += len(rows)
+                self.stats["flushes"] += 1
+
+    @property
+    def backlog(self):
+        """Number of rows waiting to be written."""
+        return len(self._buffer)
+
+    def close(self):
+        """Flush remaining rows, stop the writer thread and close the file."""
+        self._closed.set()
+        self._wakeup.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _writer_loop(self):
+        while not self._closed.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if self.stop_event is not None and self.stop_event.is_set():
+                self._closed.set()
+
+        self.flush()
+        with self._io_lock:
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def webcam_capture(
+    stop_event, name, source=None, screenshot=None, save_stills=None, telemetry=None
+):
+    """Run webcam capture in a separate thread.
+
+    This thread only grabs frames; encoding happens on the FramePipeline
+    worker threads. ``source`` and ``screenshot`` default to the configured
+    webcam and ``pyautogui.screenshot``; pass a ``frame_sources`` source and
+    ``synthetic_screenshot`` to run without a camera or display.
+    ``save_stills`` defaults to ``config.WEBCAM_FRAME``. Frame counts are
+    reported to ``telemetry`` when given, and returned at the end.
+    """
+    if source is None:
+        source = _import_backend("cv2").VideoCapture(config.WEBCAM_INDEX)
+    cap = source
     if not cap.isOpened():
         print(f"Error: Could not open webcam with index {config.WEBCAM_INDEX}")
-        return
+        if telemetry is not None:
+            telemetry.event("webcam_open_failed", index=config.WEBCAM_INDEX)
+        return None
+    if save_stills is None:
+        save_stills = config.WEBCAM_FRAME
+    if screenshot is None and save_stills:
+        # pyautogui probes the display when imported
+        screenshot = _import_backend("pyautogui").screenshot
 
     frame_width = int(cap.get(3))
     frame_height = int(cap.get(4))
-    fps = 30
 
     # Video writer setup
     video_filename = f"data/{name}/video_recordings/webcam_{datetime.now().strftime('%Y%m%d_%H%M%S')}.avi"
-    fourcc = cv2.VideoWriter_fourcc(*"XVID")
-    out = cv2.VideoWriter(video_filename, fourcc, fps, (frame_width, frame_height))
+    FramePipeline = _import_backend("frame_pipeline").FramePipeline
+    still_saver = None
+    if save_stills:
+        StillSaver = _import_backend("still_capture").StillSaver
+        still_saver = StillSaver(
+            f"data/{name}", **getattr(config, "STILL_OPTIONS", {})
+        )
+    pipeline = FramePipeline(
+        video_filename,
+        (frame_width, frame_height),
+        still_saver=still_saver,
+        screenshot=screenshot,
+        segment_seconds=getattr(config, "VIDEO_SEGMENT_SECONDS", 60),
+        segment_bytes=getattr(config, "VIDEO_SEGMENT_BYTES", None),
+    )
+    pipeline.start()
+    if telemetry is not None:
+        telemetry.watch(
+            "webcam",
+            lambda: dict(pipeline.stats, queue_depth=pipeline.video_queue.qsize()),
+            rates=("captured", "written"),
+        )
 
+    _mark_startup("webcam_recording")
     print(f"[{datetime.now()}] Webcam recording started. Press 'q' to stop.")
 
-    last_capture_time = time.time()
     while not stop_event.is_set():
         ret, frame = cap.read()
         if not ret:
             print("Failed to capture frame from webcam.")
+            if telemetry is not None:
+                telemetry.event("webcam_read_failed", frame=pipeline.stats["captured"])
             break
+        pipeline.submit(frame, time.time())
 
-        out.write(frame)
-        current_time = time.time()
-        timestamp = current_time
+    cap.release()
+    stats = pipeline.stop()
+    print(
+        f"[{datetime.now()}] Webcam recording stopped. "
+        f"{stats['written']}/{stats['captured']} frames written "
+        f"({stats['dropped_video']} dropped, {stats['dropped_stills']} stills dropped)."
+    )
+    return stats
 
-        # Capture every 0.2 seconds
-        if config.WEBCAM_FRAME and current_time - last_capture_time >= 0.2:
-            screenshot_name = f"data/{name}/screenshots/screenshot_{timestamp}.png"
-            screenshot = pyautogui.screenshot()
-            screenshot.save(screenshot_name)
 
-            webcam_frame_name = f"data/{name}/webcam_frames/webcam_{timestamp}.png"
-            cv2.imwrite(webcam_frame_name, frame)
+def make_notification_handler(logger, telemetry=None, monitor=None, source=None):
+    """Build the BLE notification callback that feeds ``logger``.
 
-            last_capture_time = current_time
+    When given, ``monitor`` (a ``live_ecg.HeartRateMonitor``) sees every
+    sample as it arrives. ``source`` names the sensor in telemetry when
+    several are recorded at once.
+    """
 
-    cap.release()
-    out.release()
-    print(f"[{datetime.now()}] Webcam recording stopped.")
+    def notification_handler(_, data):
+        start = time.perf_counter()
+        # Decode all 16 samples and the sensor timestamp (bytes 2-6) at once;
+        # non-ECG packets decode to None
+        decoded = decode_packet(data)
+        if decoded is not None:
+            device_ts, raw_values, scaled_values = decoded
+            timestamps = logger.log_packet(raw_values, scaled_values, device_ts)
+            if monitor is not None:
+                monitor.add_samples(timestamps, scaled_values)
+            if telemetry is not None:
+                telemetry.record_packet(
+                    device_ts, len(raw_values), time.perf_counter() - start, source
+                )
 
+    return notification_handler
 
-async def run_ble_client(end_of_serial, stop_event, name):
-    logger = RawECGLogger(name)  # Pass name to RawECGLogger
 
-    print(f"[{datetime.now()}] Starting BLE client...")
-    devices = await BleakScanner.discover()
+def print_heart_rate_status(status, label=None):
+    prefix = f"[{datetime.now()}] " + (f"{label}: " if label else "")
+    if status["contact_ok"]:
+        if status["heart_rate"] is not None:
+            print(f"{prefix}Heart rate: {status['heart_rate']:.0f} bpm")
+    elif status["seconds_since_beat"] is None:
+        print(f"{prefix}No heartbeat detected yet, check electrode contact")
+    else:
+        print(
+            f"{prefix}No heartbeat for "
+            f"{status['seconds_since_beat']:.0f} s, check electrode contact"
+        )
+
 
-    # Look for a device whose name ends with the provided serial
-    device = next(
-        (d for d in devices if d.name and d.name.endswith(end_of_serial)), None
+async def discover_devices(serials, timeout=5.0):
+    """Find several sensors in one shared BLE scan.
+
+    Returns ``{serial: BLEDevice or None}``, matching device names that end
+    with each serial. The scan stops early once every serial has been seen.
+    """
+    bleak = _import_backend("bleak")
+    found = {}
+    all_found = asyncio.Event()
+
+    def detected(device, _):
+        for serial in serials:
+            if serial not in found and device.name and device.name.endswith(serial):
+                found[serial] = device
+        if len(found) == len(serials):
+            all_found.set()
+
+    async with bleak.BleakScanner(detection_callback=detected):
+        try:
+            await asyncio.wait_for(all_found.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return {serial: found.get(serial) for serial in serials}
+
+
+async def run_ble_client(
+    end_of_serial,
+    stop_event,
+    name,
+    telemetry=None,
+    device=None,
+    stop_on_failure=True,
+    label=None,
+):
+    """Record the ECG stream of the sensor whose name ends with ``end_of_serial``.
+
+    ``device`` skips the scan when the sensor was already found, e.g. by
+    ``preflight``. With ``stop_on_failure`` a missing device, disconnect or
+    error sets ``stop_event`` and so ends the whole session; otherwise only
+    this client stops. ``label`` marks one of several concurrent sensors: its
+    logs go to ``ecg_logs/<label>`` and its telemetry and status lines are
+    tagged with it. Returns the client's throughput summary.
+    """
+    bleak = _import_backend("bleak")
+    tag = f"{label}: " if label else ""
+    logger = RawECGLogger(
+        name,
+        stop_event,
+        log_format=getattr(config, "ECG_LOG_FORMAT", "csv"),
+        serial=end_of_serial,
+        log_dir=f"data/{name}/ecg_logs/{label}" if label else None,
+    )  # Pass name to RawECGLogger
+    monitor = HeartRateMonitor(
+        logger.sampling_rate,
+        trace_path=logger.log_dir
+        / f"{logger.log_file.stem.replace('ecg_raw_log', 'hr_trace')}.csv",
     )
+    if telemetry is not None:
+        suffix = f"[{label}]" if label else ""
+        telemetry.watch(
+            f"ecg_writer{suffix}",
+            lambda: dict(logger.stats, backlog=logger.backlog),
+            rates=("rows_written",),
+        )
+        telemetry.watch(f"heart_rate{suffix}", monitor.status)
+
+    result = {"serial": end_of_serial, "device": None, "seconds": 0.0, "error": None}
+
+    def fail(error):
+        result["error"] = error
+        if stop_on_failure:
+            stop_event.set()  # Signal to stop other threads
+
+    print(f"[{datetime.now()}] {tag}Starting BLE client...")
+    if device is None:
+        device = (await discover_devices([end_of_serial]))[end_of_serial]
     if not device:
         print(f"Device ending with {end_of_serial} not found!")
-        stop_event.set()  # Signal to stop other threads
-        return
-
+        if telemetry is not None:
+            telemetry.event("device_not_found", serial=end_of_serial)
+        fail("not found")
+        logger.close()
+        monitor.close()
+        return dict(result, rows_written=0, samples_per_s=0.0)
+
+    result["device"] = device.name
     print(f"[{datetime.now()}] Device found: {device.name}")
-    print(f"[{datetime.now()}] Connecting to device...")
+    print(f"[{datetime.now()}] {tag}Connecting to device...")
 
     disconnect_event = asyncio.Event()
 
     def disconnect_callback(_):
-        print(f"[{datetime.now()}] Disconnected!")
+        print(f"[{datetime.now()}] {tag}Disconnected!")
+        if telemetry is not None:
+            telemetry.event("disconnected", device=device.name)
         disconnect_event.set()
-        stop_event.set()  # Signal to stop other threads
+        fail("disconnected")
 
-    def notification_handler(_, data):
-        dv = DataView(data)
-        # Check packet type
-        if dv.get_uint8(0) == 2 and dv.get_uint8(1) == 100:
-            # Each packet contains 16 samples; process each one
-            for i in range(16):
-                # Read raw ECG value from the packet
-                raw_dv = dv.get_uint32(6 + i * 4)
-                sample_mv = dv.get_int32(6 + i * 4) * 0.38 * 0.001
-                # Log the sample with the current system timestamp
-                logger.log_sample(raw_dv, sample_mv)
+    notification_handler = make_notification_handler(
+        logger, telemetry, monitor, source=label
+    )
 
+    streaming_since = None
     try:
-        async with BleakClient(
+        async with bleak.BleakClient(
             device.address, disconnected_callback=disconnect_callback
         ) as client:
-            print(f"[{datetime.now()}] Connected. Starting notifications...")
+            print(f"[{datetime.now()}] {tag}Connected. Starting notifications...")
 
             await client.start_notify(NOTIFY_CHARACTERISTIC_UUID, notification_handler)
 
@@ -151,11 +446,27 @@ async def run_ble_client(end_of_serial, stop_event, name):
                 response=True,
             )
 
-            print(f"[{datetime.now()}] Subscribed to ECG stream")
-
-            # Wait until disconnected or stop event is set
+            print(f"[{datetime.now()}] {tag}Subscribed to ECG stream")
+            streaming_since = time.monotonic()
+            # Report startup once, when the first sensor starts streaming
+            if "ecg_subscribed" not in STARTUP_TIMES:
+                _mark_startup("ecg_subscribed")
+                print(startup_report())
+                if telemetry is not None:
+                    telemetry.event(
+                        "startup",
+                        imports=dict(IMPORT_TIMES),
+                        stages=dict(STARTUP_TIMES),
+                    )
+
+            # Wait until disconnected or stop event is set, reporting the
+            # live heart rate so a bad electrode contact is noticed early
+            last_status = time.monotonic()
             while not stop_event.is_set() and not disconnect_event.is_set():
                 await asyncio.sleep(0.1)
+                if time.monotonic() - last_status >= 5.0:
+                    last_status = time.monotonic()
+                    print_heart_rate_status(monitor.status(), label)
 
             # Cleanup
             if client.is_connected:
@@ -164,42 +475,268 @@ async def run_ble_client(end_of_serial, stop_event, name):
                 )
                 await client.stop_notify(NOTIFY_CHARACTERISTIC_UUID)
     except Exception as e:
-        print(f"[{datetime.now()}] Error in BLE client: {e}")
-        stop_event.set()  # Signal to stop other threads
+        print(f"[{datetime.now()}] {tag}Error in BLE client: {e}")
+        if telemetry is not None:
+            telemetry.event("ble_error", device=device.name, error=str(e))
+        fail(str(e))
+    finally:
+        logger.close()
+        monitor.close()
+
+    if streaming_since is not None:
+        result["seconds"] = time.monotonic() - streaming_since
+    rows = logger.stats["rows_written"]
+    return dict(
+        result,
+        rows_written=rows,
+        samples_per_s=rows / result["seconds"] if result["seconds"] else 0.0,
+    )
+
+
+def print_throughput(results):
+    print(f"[{datetime.now()}] ECG throughput per device:")
+    for r in results:
+        status = f"  ({r['error']})" if r["error"] else ""
+        print(
+            f"  {r['serial']:<10} {r['rows_written']:>9} samples  "
+            f"{r['seconds']:8.1f} s  {r['samples_per_s']:7.1f} samples/s{status}"
+        )
+
+
+async def run_ble_clients(serials, stop_event, name, telemetry=None, devices=None):
+    """Record several sensors concurrently on this event loop.
+
+    The sensors are found in one shared scan unless ``devices`` (as returned
+    by ``discover_devices``) is given. Each gets its own logger and its own
+    client, and a missing, failing or disconnected sensor only ends its own
+    client. With a single serial this is ``run_ble_client`` unchanged, where a
+    failure stops the session. Returns the per-device throughput summaries.
+    """
+    if len(serials) == 1:
+        serial = serials[0]
+        device = devices.get(serial) if devices else None
+        results = [await run_ble_client(serial, stop_event, name, telemetry, device)]
+        print_throughput(results)
+        return results
+
+    if devices is None:
+        print(f"[{datetime.now()}] Scanning for {len(serials)} devices...")
+        devices = await discover_devices(serials)
+
+    found = [serial for serial in serials if devices.get(serial) is not None]
+    for serial in serials:
+        if serial not in found:
+            print(f"Device ending with {serial} not found!")
+            if telemetry is not None:
+                telemetry.event("device_not_found", serial=serial)
+
+    outcomes = await asyncio.gather(
+        *(
+            run_ble_client(
+                serial,
+                stop_event,
+                name,
+                telemetry,
+                devices[serial],
+                stop_on_failure=False,
+                label=serial,
+            )
+            for serial in found
+        ),
+        return_exceptions=True,
+    )
+    outcomes = dict(zip(found, outcomes))
+
+    results = []
+    for serial in serials:
+        outcome = outcomes.get(serial)
+        if outcome is None or isinstance(outcome, BaseException):
+            error = "not found" if outcome is None else str(outcome)
+            if outcome is not None:
+                print(f"[{datetime.now()}] {serial}: BLE client failed: {error}")
+            outcome = {
+                "serial": serial,
+                "device": None,
+                "seconds": 0.0,
+                "error": error,
+                "rows_written": 0,
+                "samples_per_s": 0.0,
+            }
+        results.append(outcome)
+    print_throughput(results)
+    return results
+
+
+def _check_camera(index):
+    cap = _import_backend("cv2").VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"could not open webcam index {index}")
+        ok, frame = cap.read()
+        if not ok:
+            raise RuntimeError(f"webcam index {index} returned no frame")
+        return f"{frame.shape[1]}x{frame.shape[0]}"
+    finally:
+        cap.release()
+
+
+def _check_display():
+    width, height = _import_backend("pyautogui").screenshot().size
+    return f"{width}x{height}"
+
+
+async def _check_ble(serials, timeout):
+    devices = await discover_devices(serials, timeout)
+    missing = [serial for serial, device in devices.items() if device is None]
+    if missing:
+        raise RuntimeError(f"no device ending with {', '.join(missing)} found")
+    return devices
+
+
+def require_config():
+    """Stop with a clear message when there is no ``config.py`` to record with."""
+    if config is None:
+        raise SystemExit(
+            "config.py not found: create it next to this script with WEBCAM_INDEX, "
+            "WEBCAM_FRAME and ECG_SERIAL (or ECG_SERIALS)"
+        )
+
+
+def ecg_serials():
+    """Serials to record: ``config.ECG_SERIALS`` if set, else ``config.ECG_SERIAL``."""
+    serials = getattr(config, "ECG_SERIALS", None) or [config.ECG_SERIAL]
+    return [str(serial) for serial in serials]
+
+
+async def preflight(
+    serials, webcam_index=None, check_display=True, timeout=PREFLIGHT_TIMEOUT
+):
+    """Check the camera, display and ECG sensors concurrently.
+
+    Returns ``{check: (ok, detail)}``. On success the ``"ble"`` detail is
+    ``{serial: BLEDevice}``, which ``run_ble_clients`` can use without
+    scanning again; on failure every detail is the error message.
+    """
+    if webcam_index is None:
+        webcam_index = config.WEBCAM_INDEX
+
+    async def timed(check, awaitable):
+        start = time.perf_counter()
+        try:
+            ok, detail = True, await asyncio.wait_for(awaitable, timeout + 1)
+        except Exception as e:
+            ok, detail = False, str(e) or type(e).__name__
+        return check, ok, detail, time.perf_counter() - start
+
+    checks = [
+        timed("camera", asyncio.to_thread(_check_camera, webcam_index)),
+        timed("ble", _check_ble(serials, timeout)),
+    ]
+    if check_display:
+        checks.append(timed("display", asyncio.to_thread(_check_display)))
+
+    results = {}
+    for check, ok, detail, seconds in await asyncio.gather(*checks):
+        shown = (
+            ", ".join(device.name for device in detail.values())
+            if check == "ble" and ok
+            else detail
+        )
+        print(
+            f"[{datetime.now()}] Preflight {check:<7} "
+            f"{'OK' if ok else 'FAILED':<6} ({seconds:.2f} s) {shown}"
+        )
+        results[check] = (ok, detail)
+    return results
 
 
-async def main_async(stop_event, end_of_serial, name):
+async def main_async(stop_event, serials, name, telemetry=None, devices=None):
     """Main async function to run ECG collection"""
-    await run_ble_client(end_of_serial, stop_event, name)
+    await run_ble_clients(serials, stop_event, name, telemetry, devices)
 
 
-def main(name):  # Add name as a parameter
+def main(name, run_preflight=True):  # Add name as a parameter
+    """Record a session into ``data/<name>``.
+
+    With ``run_preflight`` the camera, display and sensor are checked first
+    and the session is not started if any of them fails. Returns False in
+    that case.
+    """
+    require_config()
     logging.basicConfig(level=logging.INFO)
+    serials = ecg_serials()
+    devices = None
+    if run_preflight:
+        results = asyncio.run(
+            preflight(serials, check_display=bool(config.WEBCAM_FRAME))
+        )
+        failed = [check for check, (ok, _) in results.items() if not ok]
+        if failed:
+            print(
+                f"[{datetime.now()}] Preflight failed ({', '.join(failed)}), "
+                "not starting the session"
+            )
+            return False
+        devices = results["ble"][1]
+        _mark_startup("preflight")
+
     os.makedirs(f"data/{name}/webcam_frames", exist_ok=True)
     os.makedirs(f"data/{name}/screenshots", exist_ok=True)
     os.makedirs(f"data/{name}/video_recordings", exist_ok=True)
     os.makedirs(f"data/{name}/ecg_logs", exist_ok=True)
     stop_event = threading.Event()
+    telemetry = Telemetry(f"data/{name}", sampling_rate=SAMPLING_RATE).start()
 
     # Start webcam capture in a thread
     webcam_thread = threading.Thread(
-        target=webcam_capture, args=(stop_event, name)
+        target=webcam_capture,
+        args=(stop_event, name),
+        kwargs={"telemetry": telemetry},
     )  # Pass name
     webcam_thread.start()
 
     try:
         # Run ECG collection in the main thread
-        asyncio.run(main_async(stop_event, str(config.ECG_SERIAL), name))
+        asyncio.run(
+            main_async(stop_event, serials, name, telemetry, devices)
+        )
     except KeyboardInterrupt:
         print(f"[{datetime.now()}] Program interrupted by user")
     finally:
         # Stop all threads when program ends
         stop_event.set()
         webcam_thread.join()
+        telemetry.close()
+        try:
+            _import_backend("session_index").SessionIndex.build(f"data/{name}")
+        except Exception as e:
+            print(f"[{datetime.now()}] Could not build session index: {e}")
         print(f"[{datetime.now()}] All processes stopped")
+    return True
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record ECG, webcam and screenshots.")
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Only check the camera, display and sensor, then exit",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="Start recording without checking the devices first",
+    )
+    args = parser.parse_args()
+
+    if args.preflight:
+        require_config()
+        results = asyncio.run(
+            preflight(ecg_serials(), check_display=bool(config.WEBCAM_FRAME))
+        )
+        print(startup_report())
+        raise SystemExit(0 if all(ok for ok, _ in results.values()) else 1)
+
     # count no. of folders in data directory
     count = len(os.listdir("data"))
-    main(count)
+    main(count, run_preflight=not args.no_preflight)
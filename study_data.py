@@ -0,0 +1,115 @@
+import hashlib
+import inspect
+import pickle
+import warnings
+from pathlib import Path
+
+import pandas as pd
+from scipy import stats
+
+try:
+    import pyarrow  # noqa: F401
+
+    CACHE_SUFFIX = '.parquet'
+except ImportError:
+    CACHE_SUFFIX = '.pkl'
+
+CACHE_DIR = '.cache'
+
+
+def add_derived_columns(df):
+    """Add the z-scores, Strain_Index and Learning_Ease used by every report."""
+    # Ease Calculation (High Likert = Good)
+    df['z_NASA'] = stats.zscore(df['NASA_Total'])
+    df['z_HR'] = stats.zscore(df['Delta_HR'])
+    df['z_Pupil'] = stats.zscore(df['Delta_Pupil_mean'])
+    df['z_Likert'] = stats.zscore(df['LIKERT_Total'])
+
+    # Strain Index
+    df['Strain_Index'] = (df['z_NASA'] + df['z_HR'] + df['z_Pupil'] + df['z_Likert']) / 4
+    df['Learning_Ease'] = -1 * df['Strain_Index']
+    return df
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _features_hash():
+    return hashlib.sha1(inspect.getsource(add_derived_columns).encode()).hexdigest()
+
+
+def _read_source(path):
+    if path.suffix in ('.xlsx', '.xls'):
+        return pd.read_excel(path)
+    return pd.read_csv(path)
+
+
+def _write_cache(df, path):
+    """Write ``df`` to ``path``, or next to it as a pickle if Parquet can't hold it.
+
+    Parquet rejects object columns that mix types (e.g. a hand-typed notes
+    column with numbers and text). Returns the file written, or None if the
+    table could not be cached at all.
+    """
+    if path.suffix == '.parquet':
+        try:
+            df.to_parquet(path, index=False)
+            return path
+        except Exception:
+            path.unlink(missing_ok=True)
+            path = path.with_suffix('.pkl')
+    try:
+        df.to_pickle(path)
+        return path
+    except (OSError, pickle.PicklingError) as exc:
+        path.unlink(missing_ok=True)
+        warnings.warn(f"Could not cache study table to '{path}': {exc}")
+        return None
+
+
+def _read_cache(path):
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def load_study_table(path='data.xlsx', cache_dir=CACHE_DIR, use_cache=True):
+    """Load the study table with its derived columns, caching the result.
+
+    The cache entry is keyed on the source file's content hash and on the
+    source of ``add_derived_columns``, so editing either one invalidates
+    it. It is stored as Parquet when pyarrow is installed and the table
+    fits Parquet's column types, else as a pickle; if it can't be written
+    at all the table is returned uncached. Raises FileNotFoundError if
+    ``path`` does not exist.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    if not use_cache:
+        return add_derived_columns(_read_source(path))
+
+    cache_dir = Path(cache_dir)
+    key = f'{_file_hash(path)[:16]}-{_features_hash()[:12]}'
+    cache_file = cache_dir / f'{path.stem}-{key}{CACHE_SUFFIX}'
+    for candidate in (cache_file, cache_file.with_suffix('.pkl')):
+        if candidate.exists():
+            return _read_cache(candidate)
+
+    df = add_derived_columns(_read_source(path))
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Drop entries for older versions of the same table
+        for suffix in {CACHE_SUFFIX, '.pkl'}:
+            for stale in cache_dir.glob(f'{path.stem}-*{suffix}'):
+                stale.unlink()
+    except OSError as exc:
+        warnings.warn(f"Could not use cache directory '{cache_dir}': {exc}")
+        return df
+    _write_cache(df, cache_file)
+    return df
@@ -0,0 +1,195 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Upper bounds of the handler-duration histogram buckets, in microseconds
+LATENCY_BUCKETS_US = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000)
+
+log = logging.getLogger("telemetry")
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations, cheap enough for every callback."""
+
+    def __init__(self, buckets_us=LATENCY_BUCKETS_US):
+        self.buckets_us = buckets_us
+        self.counts = [0] * (len(buckets_us) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def add(self, duration_s):
+        us = duration_s * 1e6
+        self.counts[bisect.bisect_left(self.buckets_us, us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def to_dict(self):
+        labels = [f"<={b}us" for b in self.buckets_us]
+        labels.append(f">{self.buckets_us[-1]}us")
+        return {
+            "count": self.count,
+            "mean_us": self.total_us / self.count if self.count else 0.0,
+            "max_us": self.max_us,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class Telemetry:
+    """Live acquisition metrics for one recording session.
+
+    The BLE notification handler reports every packet through
+    ``record_packet``; other components register a ``watch`` callback that
+    returns a dict of their current counters (writer backlog, frame counts).
+    Every ``interval`` seconds a structured record is logged and appended to
+    ``session_dir/telemetry.jsonl``; ``close`` writes the whole-session
+    summary to ``session_dir/session_summary.json``.
+    """
+
+    def __init__(self, session_dir, sampling_rate=128, interval=5.0):
+        self.session_dir = Path(session_dir)
+        self.sampling_rate = sampling_rate
+        self.interval = interval
+        self.started = time.time()
+
+        self._lock = threading.Lock()
+        self._watches = {}
+        self._events = []
+        self._totals = {
+            "packets": 0,
+            "samples": 0,
+            "gaps": 0,
+            "missing_packets": 0,
+        }
+        self._histogram = LatencyHistogram()
+        self._interval_histogram = LatencyHistogram()
+        self._last_device_ts = {}
+        self._last_report = {"time": self.started, "totals": dict(self._totals)}
+        self._last_watch = {}
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._report_loop, name="telemetry", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def record_packet(self, device_ts, n_samples, duration_s, source=None):
+        """Count a decoded ECG packet and how long its callback took.
+
+        ``source`` keeps gap detection separate per sensor when several
+        stream at once.
+        """
+        expected_ms = n_samples * 1000.0 / self.sampling_rate
+        with self._lock:
+            self._totals["packets"] += 1
+            self._totals["samples"] += n_samples
+            last_ts = self._last_device_ts.get(source)
+            if last_ts is not None:
+                delta = (device_ts - last_ts) % 2**32
+                if delta > 1.5 * expected_ms:
+                    self._totals["gaps"] += 1
+                    self._totals["missing_packets"] += round(delta / expected_ms) - 1
+            self._last_device_ts[source] = device_ts
+            self._histogram.add(duration_s)
+            self._interval_histogram.add(duration_s)
+
+    def watch(self, name, snapshot, rates=()):
+        """Poll ``snapshot()`` every interval.
+
+        ``snapshot`` returns a dict of counters; the keys listed in ``rates``
+        are also reported as per-second rates.
+        """
+        with self._lock:
+            self._watches[name] = (snapshot, rates)
+
+    def event(self, kind, **fields):
+        """Record a one-off event such as a disconnect or a failed frame."""
+        record = {"time": time.time(), "event": kind, **fields}
+        with self._lock:
+            self._events.append(record)
+        log.info(json.dumps(record))
+
+    def report(self):
+        """Build, log and persist one interval record."""
+        now = time.time()
+        with self._lock:
+            totals = dict(self._totals)
+            histogram = self._interval_histogram.to_dict()
+            self._interval_histogram = LatencyHistogram()
+            watches = dict(self._watches)
+
+        elapsed = max(now - self._last_report["time"], 1e-9)
+        previous = self._last_report["totals"]
+        record = {
+            "time": now,
+            "type": "interval",
+            "ecg": {
+                "packets_per_s": (totals["packets"] - previous["packets"]) / elapsed,
+                "samples_per_s": (totals["samples"] - previous["samples"]) / elapsed,
+                "gaps": totals["gaps"] - previous["gaps"],
+                "missing_packets": totals["missing_packets"]
+                - previous["missing_packets"],
+                "handler": histogram,
+            },
+        }
+        for name, (snapshot, rates) in watches.items():
+            values = dict(snapshot())
+            last = self._last_watch.get(name, {})
+            for key in rates:
+                values[f"{key}_per_s"] = (values[key] - last.get(key, 0)) / elapsed
+            self._last_watch[name] = values
+            record[name] = values
+
+        self._last_report = {"time": now, "totals": totals}
+        log.info(json.dumps(record))
+        with open(self.session_dir / "telemetry.jsonl", "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def summary(self):
+        now = time.time()
+        with self._lock:
+            totals = dict(self._totals)
+            histogram = self._histogram.to_dict()
+            events = list(self._events)
+            watches = dict(self._watches)
+        duration = max(now - self.started, 1e-9)
+        return {
+            "started": datetime.fromtimestamp(self.started).isoformat(),
+            "duration_s": duration,
+            "ecg": dict(
+                totals,
+                packets_per_s=totals["packets"] / duration,
+                samples_per_s=totals["samples"] / duration,
+                handler=histogram,
+            ),
+            **{name: dict(snapshot()) for name, (snapshot, _) in watches.items()},
+            "events": events,
+        }
+
+    def close(self):
+        """Stop periodic reporting and write the session summary."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        summary = self.summary()
+        with open(self.session_dir / "session_summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def _report_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.report()
+            except Exception as e:
+                log.warning(f"Telemetry report failed: {e}")
@@ -1,24 +1,17 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
 
-def topic_interaction_analysis():
-    print("Loading data...")
-    try:
-        df = pd.read_excel('data.xlsx')
-    except FileNotFoundError:
-        print("Error: data.xlsx not found.")
-        return
+from study_data import load_study_table
 
-    # --- Feature Engineering ---
-    df['z_NASA'] = stats.zscore(df['NASA_Total'])
-    df['z_HR'] = stats.zscore(df['Delta_HR'])
-    df['z_Pupil'] = stats.zscore(df['Delta_Pupil_mean'])
-    df['z_Likert'] = stats.zscore(df['LIKERT_Total'])
-    df['Strain_Index'] = (df['z_NASA'] + df['z_HR'] + df['z_Pupil'] + df['z_Likert']) / 4
-    df['Learning_Ease'] = -1 * df['Strain_Index']
+def topic_interaction_analysis(df=None):
+    if df is None:
+        print("Loading data...")
+        try:
+            df = load_study_table('data.xlsx')
+        except FileNotFoundError:
+            print("Error: data.xlsx not found.")
+            return
 
     # --- PLOT: Topic x Modality Interaction ---
     # Question: Does the effectiveness of a modality depend on the Topic Order (Fatigue)?